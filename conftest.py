@@ -0,0 +1,12 @@
+"""
+Shared pytest setup.
+
+create_map_poster loads fonts and themes relative to the working directory,
+so the suite runs from the repository root wherever pytest is started.
+"""
+
+import os
+
+
+def pytest_configure(config):
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
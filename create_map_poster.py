@@ -12,17 +12,40 @@ Generate beautiful, minimalist map posters for any city in the world.
 #   "geopy>=2.4.1",
 #   "tqdm>=4.67.1",
 #   "numpy>=2.4.0",
+#   "requests>=2.32.5",
+#   "shapely>=2.1.2",
 # ]
 # ///
 import osmnx as ox
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.collections import PathCollection
+from matplotlib.path import Path
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.font_manager import FontProperties
 import matplotlib.colors as mcolors
 import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from shapely.geometry import box
 from geopy.geocoders import Nominatim
+from geopy.adapters import AdapterHTTPError, BaseSyncAdapter
+from geopy.exc import GeocoderParseError, GeocoderTimedOut, GeocoderUnavailable
+import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 import time
 import json
+import random
+import threading
+import email.utils
+import functools
+import bisect
+import contextlib
+import csv
+import pickle
+import hashlib
+import unicodedata
 import os
 from datetime import datetime
 import argparse
@@ -81,43 +104,60 @@ def load_fonts(typeface='Roboto'):
 # FONTS = load_fonts('YourFontName')
 FONTS = load_fonts('Roboto')
 
-def generate_output_filename(city, theme_name):
+def generate_output_filename(city, theme_name, suffix=None):
     """
     Generate unique output filename with city, theme, and datetime.
+
+    Args:
+        suffix (str): Appended to the name, for outputs that can share city,
+                      theme and second (e.g. the job number in a batch)
+    """
+    os.makedirs(POSTERS_DIR, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    city_slug = city.lower().replace(' ', '_')
+    filename = f"{city_slug}_{theme_name}_{timestamp}"
+    if suffix:
+        filename += f"_{suffix}"
+    return os.path.join(POSTERS_DIR, f"{filename}.png")
+
+def generate_sequence_dirname(city, theme_name):
+    """
+    Generate unique output directory for the frames of a zoom sequence.
     """
-    if not os.path.exists(POSTERS_DIR):
-        os.makedirs(POSTERS_DIR)
-    
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     city_slug = city.lower().replace(' ', '_')
-    filename = f"{city_slug}_{theme_name}_{timestamp}.png"
-    return os.path.join(POSTERS_DIR, filename)
+    return os.path.join(POSTERS_DIR, f"{city_slug}_{theme_name}_{timestamp}_sequence")
+
+def temp_path(path):
+    """
+    Temporary file name next to `path`, unique per process and thread.
+
+    Cache writers dump to this name and os.replace() it onto `path`, so
+    concurrent writers never clobber each other's half-written files.
+    """
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
 
 def get_available_themes():
     """
-    Scans the themes directory and returns a list of available theme names.
+    Returns the names of the valid themes in the themes directory.
+    Themes are scanned once by the shared ThemeRegistry.
     """
-    if not os.path.exists(THEMES_DIR):
-        os.makedirs(THEMES_DIR)
-        return []
-    
-    themes = []
-    for file in sorted(os.listdir(THEMES_DIR)):
-        if file.endswith('.json'):
-            theme_name = file[:-5]  # Remove .json extension
-            themes.append(theme_name)
-    return themes
+    return get_theme_registry().names()
 
 def load_theme(theme_name="feature_based"):
     """
-    Load theme from JSON file in themes directory.
+    Load a compiled theme (see compile_theme()) from the theme registry.
+
+    Raises:
+        ValueError: If the theme file exists but is invalid
     """
-    theme_file = os.path.join(THEMES_DIR, f"{theme_name}.json")
-    
-    if not os.path.exists(theme_file):
+    registry = get_theme_registry()
+    if theme_name not in registry.names() and theme_name not in registry.errors:
+        theme_file = os.path.join(THEMES_DIR, f"{theme_name}.json")
         print(f"⚠ Theme file '{theme_file}' not found. Using default feature_based theme.")
         # Fallback to embedded default theme
-        return {
+        return compile_theme({
             "name": "Feature-Based Shading",
             "bg": "#FFFFFF",
             "text": "#000000",
@@ -130,14 +170,13 @@ def load_theme(theme_name="feature_based"):
             "road_tertiary": "#3A3A3A",
             "road_residential": "#4A4A4A",
             "road_default": "#3A3A3A"
-        }
-    
-    with open(theme_file, 'r') as f:
-        theme = json.load(f)
-        print(f"✓ Loaded theme: {theme.get('name', theme_name)}")
-        if 'description' in theme:
-            print(f"  {theme['description']}")
-        return theme
+        })
+
+    theme = registry.get(theme_name)
+    print(f"✓ Loaded theme: {theme.get('name', theme_name)}")
+    if 'description' in theme:
+        print(f"  {theme['description']}")
+    return theme
 
 # Load theme (can be changed via command line or input)
 THEME = None  # Will be loaded later
@@ -180,7 +219,9 @@ def create_gradient_fade(ax, color, location='bottom', zorder=10):
                         transform=ax.transAxes,  # Use axis coordinates, not data
                         facecolor=rgb, edgecolor='none',
                         alpha=alpha, zorder=zorder)
-        ax.add_patch(rect)
+        # add_artist, not add_patch: axis-coordinate patches have no data limits
+        # to update, and that update dominated the cost of the fade
+        ax.add_artist(rect)
 
 
 # FIX #1 - 100 steps (worked, but commented out in favor of faster 50-step version)
@@ -294,67 +335,22 @@ def create_gradient_fade(ax, color, location='bottom', zorder=10):
 #                                   alpha=alpha, zorder=zorder)
 #         ax.add_patch(rect)
 
-def get_edge_colors_by_type(G):
+def get_edge_colors_by_type(edges, theme=None):
     """
     Assigns colors to edges based on road type hierarchy.
-    Returns a list of colors corresponding to each edge in the graph.
+    Returns an (N, 4) RGBA array with one color per edge in the GeoDataFrame.
+    Uses the module-level THEME unless a theme dict is given.
     """
-    edge_colors = []
-    
-    for u, v, data in G.edges(data=True):
-        # Get the highway type (can be a list or string)
-        highway = data.get('highway', 'unclassified')
-        
-        # Handle list of highway types (take the first one)
-        if isinstance(highway, list):
-            highway = highway[0] if highway else 'unclassified'
-        
-        # Assign color based on road type
-        if highway in ['motorway', 'motorway_link']:
-            color = THEME['road_motorway']
-        elif highway in ['trunk', 'trunk_link', 'primary', 'primary_link']:
-            color = THEME['road_primary']
-        elif highway in ['secondary', 'secondary_link']:
-            color = THEME['road_secondary']
-        elif highway in ['tertiary', 'tertiary_link']:
-            color = THEME['road_tertiary']
-        elif highway in ['residential', 'living_street', 'unclassified']:
-            color = THEME['road_residential']
-        else:
-            color = THEME['road_default']
-        
-        edge_colors.append(color)
-    
-    return edge_colors
+    theme = compile_theme(THEME if theme is None else theme)
+    return theme['road_colors'][road_style_indices(edges['highway'])]
 
-def get_edge_widths_by_type(G):
+def get_edge_widths_by_type(edges):
     """
-    Assigns line widths to edges based on road type.
+    Assigns line widths to edges based on road type (see ROAD_WIDTHS).
     Major roads get thicker lines.
     """
-    edge_widths = []
-    
-    for u, v, data in G.edges(data=True):
-        highway = data.get('highway', 'unclassified')
-        
-        if isinstance(highway, list):
-            highway = highway[0] if highway else 'unclassified'
-        
-        # Assign width based on road importance
-        if highway in ['motorway', 'motorway_link']:
-            width = 1.2
-        elif highway in ['trunk', 'trunk_link', 'primary', 'primary_link']:
-            width = 1.0
-        elif highway in ['secondary', 'secondary_link']:
-            width = 0.8
-        elif highway in ['tertiary', 'tertiary_link']:
-            width = 0.6
-        else:
-            width = 0.4
-        
-        edge_widths.append(width)
-    
-    return edge_widths
+    widths = np.array([ROAD_WIDTHS[name] for name in ROAD_CLASSES])
+    return widths[road_style_indices(edges['highway'])]
 
 def calculate_city_name_font_size(city, base_size=60, min_size=30, max_chars=15):
     """
@@ -440,7 +436,7 @@ def calculate_figure_size(ratio, base_width=12):
     return (base_width, height)
 
 
-def calculate_map_bbox(point, dist, aspect_ratio, fill=False):
+def calculate_map_bbox(point, dist, aspect_ratio, fill=False, verbose=True):
     """
     Calculate appropriate bounding box for map based on aspect ratio.
 
@@ -452,6 +448,7 @@ def calculate_map_bbox(point, dist, aspect_ratio, fill=False):
         dist (int): Base distance in meters
         aspect_ratio (tuple): (width, height) ratio
         fill (bool): If True, extends bbox to completely fill the frame in both dimensions
+        verbose (bool): Print the bbox coverage (default: True)
 
     Returns:
         dict: Bounding box parameters for osmnx with dist adjustments
@@ -504,25 +501,551 @@ def calculate_map_bbox(point, dist, aspect_ratio, fill=False):
     }
 
     # Debug: print bbox coverage (always show for comparison)
-    width_km = dist_x / 1000
-    height_km = dist_y / 1000
-    print(f"  → Bbox coverage: {width_km:.2f}km wide × {height_km:.2f}km tall")
+    if verbose:
+        width_km = dist_x / 1000
+        height_km = dist_y / 1000
+        print(f"  → Bbox coverage: {width_km:.2f}km wide × {height_km:.2f}km tall")
 
     return bbox
 
 
-def get_coordinates(city, country):
+# --- Remote endpoints and HTTP client ---
+# Every outbound request (Nominatim via geopy, Overpass via OSMnx) goes through
+# one pooled requests.Session and a token bucket per endpoint. Point the
+# endpoints at local stand-in servers with the MAPTOPOSTER_OVERPASS_URL /
+# MAPTOPOSTER_NOMINATIM_URL environment variables or --overpass-url / --nominatim-url.
+# Importing the module leaves OSMnx alone: its HTTP calls are rerouted by
+# configure_endpoints(), which the CLI calls explicitly and fetching calls on first use.
+ENDPOINTS = {
+    'overpass': os.environ.get('MAPTOPOSTER_OVERPASS_URL', 'https://overpass-api.de/api'),
+    'nominatim': os.environ.get('MAPTOPOSTER_NOMINATIM_URL', 'https://nominatim.openstreetmap.org'),
+}
+
+# Token bucket policy per endpoint: (requests per second, burst size)
+RATE_LIMITS = {
+    'overpass': (1.0, 2),
+    'nominatim': (1.0, 1),  # Nominatim usage policy: at most 1 request per second
+}
+
+HTTP_RETRY_STATUSES = {429, 500, 502, 503, 504}
+HTTP_MAX_RETRIES = 5
+HTTP_BACKOFF_BASE = 1.0   # seconds, doubled on every retry
+HTTP_BACKOFF_MAX = 60.0
+HTTP_POOL_SIZE = 16       # keep-alive connections kept open per host
+
+class TokenBucket:
     """
-    Fetches coordinates for a given city and country using geopy.
-    Includes rate limiting to be respectful to the geocoding service.
+    Thread-safe token bucket that paces requests to one endpoint.
+
+    Throttled responses (429/5xx) halve the refill rate and hold the bucket
+    for the server's Retry-After delay; successful responses restore the rate
+    step by step until it is back at the configured policy.
     """
-    print("Looking up coordinates...")
-    geolocator = Nominatim(user_agent="city_map_poster")
 
-    # Add a small delay to respect Nominatim's usage policy
-    time.sleep(1)
+    def __init__(self, rate, capacity):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def throttle(self, delay):
+        """Slow down after a throttled response and pause for `delay` seconds."""
+        with self.lock:
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            self.tokens = 0
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+    def recover(self):
+        """Step the rate back towards the configured policy after a success."""
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 8)
+
+_HTTP_LOCK = threading.Lock()
+_HTTP_SESSION = None
+_RATE_LIMITERS = {}
+_ENDPOINTS_CONFIGURED = False
+
+def get_http_session():
+    """Return the shared keep-alive session used for all remote calls."""
+    global _HTTP_SESSION
+    with _HTTP_LOCK:
+        if _HTTP_SESSION is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=len(ENDPOINTS), pool_maxsize=HTTP_POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _HTTP_SESSION = session
+        return _HTTP_SESSION
+
+def get_rate_limiter(endpoint):
+    """Return the token bucket for an endpoint name ('overpass', 'nominatim')."""
+    with _HTTP_LOCK:
+        if endpoint not in _RATE_LIMITERS:
+            _RATE_LIMITERS[endpoint] = TokenBucket(*RATE_LIMITS[endpoint])
+        return _RATE_LIMITERS[endpoint]
+
+def _retry_after(response):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+
+def _backoff_delay(attempt):
+    """Exponential backoff with jitter, so parallel workers don't retry in lockstep."""
+    delay = min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def http_request(endpoint, method, url, **kwargs):
+    """
+    Send a request through the shared session, paced by the endpoint's token bucket.
+
+    429 and 5xx responses and connection errors are retried with jittered
+    exponential backoff (or the server's Retry-After delay) up to
+    HTTP_MAX_RETRIES times.
+
+    Args:
+        endpoint (str): Rate limit policy to apply ('overpass' or 'nominatim')
+        method (str): HTTP method
+        url (str): Full request URL
+        **kwargs: Passed on to requests.Session.request()
+
+    Returns:
+        requests.Response: The last response received
+    """
+    bucket = get_rate_limiter(endpoint)
+    session = get_http_session()
+
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        bucket.acquire()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == HTTP_MAX_RETRIES:
+                raise
+            bucket.throttle(_backoff_delay(attempt))
+            continue
+
+        if response.status_code not in HTTP_RETRY_STATUSES or attempt == HTTP_MAX_RETRIES:
+            if response.ok:
+                bucket.recover()
+            return response
+
+        delay = _retry_after(response)
+        bucket.throttle(delay if delay is not None else _backoff_delay(attempt))
+
+class _EndpointTransport:
+    """
+    Stand-in for the `requests` module inside OSMnx's HTTP helpers.
+
+    OSMnx calls requests.get/requests.post directly, which opens new
+    connections every time and bypasses our limiter. This routes those calls
+    through http_request() and leaves the rest of the module untouched.
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+    def get(self, url, **kwargs):
+        return self._request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self._request('POST', url, **kwargs)
+
+    def _request(self, method, url, **kwargs):
+        response = http_request(self.endpoint, method, url, **kwargs)
+        if response.status_code in HTTP_RETRY_STATUSES:
+            # Our retries are used up; returning the response would send OSMnx
+            # into its own unbounded retry loop with fixed 55 s sleeps
+            response.raise_for_status()
+        return response
+
+class _PooledGeopyAdapter(BaseSyncAdapter):
+    """geopy adapter that sends geocoding requests through http_request()."""
+
+    def get_text(self, url, *, timeout, headers):
+        return self._get(url, timeout=timeout, headers=headers).text
+
+    def get_json(self, url, *, timeout, headers):
+        response = self._get(url, timeout=timeout, headers=headers)
+        try:
+            return response.json()
+        except ValueError:
+            raise GeocoderParseError(f"Could not deserialize response:\n{response.text}")
+
+    def _get(self, url, *, timeout, headers):
+        try:
+            response = http_request('nominatim', 'GET', url, timeout=timeout,
+                                    headers=headers)
+        except requests.Timeout:
+            raise GeocoderTimedOut("Service timed out")
+        except requests.ConnectionError as e:
+            raise GeocoderUnavailable(str(e))
+        if response.status_code >= 400:
+            raise AdapterHTTPError(f"Non-successful status code {response.status_code}",
+                                   status_code=response.status_code,
+                                   headers=response.headers, text=response.text)
+        return response
+
+def configure_endpoints(overpass_url=None, nominatim_url=None):
+    """
+    Set the Overpass and Nominatim base URLs and route OSMnx through our client.
+
+    Args:
+        overpass_url (str): Overpass API base URL, without '/interpreter'
+        nominatim_url (str): Nominatim base URL, without '/search'
+    """
+    global _ENDPOINTS_CONFIGURED
+    if overpass_url:
+        ENDPOINTS['overpass'] = overpass_url
+    if nominatim_url:
+        ENDPOINTS['nominatim'] = nominatim_url
+    ENDPOINTS['overpass'] = ENDPOINTS['overpass'].rstrip('/')
+    ENDPOINTS['nominatim'] = ENDPOINTS['nominatim'].rstrip('/')
+
+    ox.settings.overpass_url = ENDPOINTS['overpass']
+    ox.settings.nominatim_url = ENDPOINTS['nominatim']
+    # Pacing is handled by our token bucket rather than OSMnx's /status polling
+    ox.settings.overpass_rate_limit = False
+    ox._overpass.requests = _EndpointTransport('overpass')
+    ox._nominatim.requests = _EndpointTransport('nominatim')
+    _ENDPOINTS_CONFIGURED = True
+
+def ensure_endpoints():
+    """Apply configure_endpoints() with the current settings unless already done."""
+    if not _ENDPOINTS_CONFIGURED:
+        configure_endpoints()
+
+def get_geocoder():
+    """Return a Nominatim geocoder bound to the configured endpoint and shared client."""
+    ensure_endpoints()
+    scheme, _, domain = ENDPOINTS['nominatim'].partition('://')
+    return Nominatim(user_agent="city_map_poster", domain=domain, scheme=scheme,
+                     adapter_factory=_PooledGeopyAdapter)
+
+# --- Offline gazetteer ---
+# A GeoNames cities dump (e.g. cities500.txt or cities15000.zip from
+# download.geonames.org/export/dump/) compiled into a sorted name index.
+# The compiled index is pickled next to the dump so later runs skip parsing.
+GAZETTEER_INDEX_VERSION = 2
+
+# ISO 3166-1 alpha-2 codes and English short names, so full country names match
+# without GeoNames' countryInfo.txt
+COUNTRY_NAMES = {
+    'AD': 'Andorra', 'AE': 'United Arab Emirates', 'AF': 'Afghanistan', 'AG': 'Antigua and Barbuda',
+    'AI': 'Anguilla', 'AL': 'Albania', 'AM': 'Armenia', 'AO': 'Angola', 'AQ': 'Antarctica',
+    'AR': 'Argentina', 'AS': 'American Samoa', 'AT': 'Austria', 'AU': 'Australia', 'AW': 'Aruba',
+    'AX': 'Aland Islands', 'AZ': 'Azerbaijan', 'BA': 'Bosnia and Herzegovina', 'BB': 'Barbados',
+    'BD': 'Bangladesh', 'BE': 'Belgium', 'BF': 'Burkina Faso', 'BG': 'Bulgaria', 'BH': 'Bahrain',
+    'BI': 'Burundi', 'BJ': 'Benin', 'BL': 'Saint Barthelemy', 'BM': 'Bermuda', 'BN': 'Brunei',
+    'BO': 'Bolivia', 'BQ': 'Bonaire, Sint Eustatius and Saba', 'BR': 'Brazil', 'BS': 'Bahamas',
+    'BT': 'Bhutan', 'BV': 'Bouvet Island', 'BW': 'Botswana', 'BY': 'Belarus', 'BZ': 'Belize',
+    'CA': 'Canada', 'CC': 'Cocos Islands', 'CD': 'Democratic Republic of the Congo',
+    'CF': 'Central African Republic', 'CG': 'Republic of the Congo', 'CH': 'Switzerland',
+    'CI': 'Ivory Coast', 'CK': 'Cook Islands', 'CL': 'Chile', 'CM': 'Cameroon', 'CN': 'China',
+    'CO': 'Colombia', 'CR': 'Costa Rica', 'CU': 'Cuba', 'CV': 'Cabo Verde', 'CW': 'Curacao',
+    'CX': 'Christmas Island', 'CY': 'Cyprus', 'CZ': 'Czechia', 'DE': 'Germany', 'DJ': 'Djibouti',
+    'DK': 'Denmark', 'DM': 'Dominica', 'DO': 'Dominican Republic', 'DZ': 'Algeria', 'EC': 'Ecuador',
+    'EE': 'Estonia', 'EG': 'Egypt', 'EH': 'Western Sahara', 'ER': 'Eritrea', 'ES': 'Spain',
+    'ET': 'Ethiopia', 'FI': 'Finland', 'FJ': 'Fiji', 'FK': 'Falkland Islands', 'FM': 'Micronesia',
+    'FO': 'Faroe Islands', 'FR': 'France', 'GA': 'Gabon', 'GB': 'United Kingdom', 'GD': 'Grenada',
+    'GE': 'Georgia', 'GF': 'French Guiana', 'GG': 'Guernsey', 'GH': 'Ghana', 'GI': 'Gibraltar',
+    'GL': 'Greenland', 'GM': 'Gambia', 'GN': 'Guinea', 'GP': 'Guadeloupe', 'GQ': 'Equatorial Guinea',
+    'GR': 'Greece', 'GS': 'South Georgia and the South Sandwich Islands', 'GT': 'Guatemala',
+    'GU': 'Guam', 'GW': 'Guinea-Bissau', 'GY': 'Guyana', 'HK': 'Hong Kong',
+    'HM': 'Heard Island and McDonald Islands', 'HN': 'Honduras', 'HR': 'Croatia', 'HT': 'Haiti',
+    'HU': 'Hungary', 'ID': 'Indonesia', 'IE': 'Ireland', 'IL': 'Israel', 'IM': 'Isle of Man',
+    'IN': 'India', 'IO': 'British Indian Ocean Territory', 'IQ': 'Iraq', 'IR': 'Iran', 'IS': 'Iceland',
+    'IT': 'Italy', 'JE': 'Jersey', 'JM': 'Jamaica', 'JO': 'Jordan', 'JP': 'Japan', 'KE': 'Kenya',
+    'KG': 'Kyrgyzstan', 'KH': 'Cambodia', 'KI': 'Kiribati', 'KM': 'Comoros', 'KN': 'Saint Kitts and Nevis',
+    'KP': 'North Korea', 'KR': 'South Korea', 'KW': 'Kuwait', 'KY': 'Cayman Islands', 'KZ': 'Kazakhstan',
+    'LA': 'Laos', 'LB': 'Lebanon', 'LC': 'Saint Lucia', 'LI': 'Liechtenstein', 'LK': 'Sri Lanka',
+    'LR': 'Liberia', 'LS': 'Lesotho', 'LT': 'Lithuania', 'LU': 'Luxembourg', 'LV': 'Latvia', 'LY': 'Libya',
+    'MA': 'Morocco', 'MC': 'Monaco', 'MD': 'Moldova', 'ME': 'Montenegro', 'MF': 'Saint Martin',
+    'MG': 'Madagascar', 'MH': 'Marshall Islands', 'MK': 'North Macedonia', 'ML': 'Mali', 'MM': 'Myanmar',
+    'MN': 'Mongolia', 'MO': 'Macao', 'MP': 'Northern Mariana Islands', 'MQ': 'Martinique',
+    'MR': 'Mauritania', 'MS': 'Montserrat', 'MT': 'Malta', 'MU': 'Mauritius', 'MV': 'Maldives',
+    'MW': 'Malawi', 'MX': 'Mexico', 'MY': 'Malaysia', 'MZ': 'Mozambique', 'NA': 'Namibia',
+    'NC': 'New Caledonia', 'NE': 'Niger', 'NF': 'Norfolk Island', 'NG': 'Nigeria', 'NI': 'Nicaragua',
+    'NL': 'Netherlands', 'NO': 'Norway', 'NP': 'Nepal', 'NR': 'Nauru', 'NU': 'Niue', 'NZ': 'New Zealand',
+    'OM': 'Oman', 'PA': 'Panama', 'PE': 'Peru', 'PF': 'French Polynesia', 'PG': 'Papua New Guinea',
+    'PH': 'Philippines', 'PK': 'Pakistan', 'PL': 'Poland', 'PM': 'Saint Pierre and Miquelon',
+    'PN': 'Pitcairn', 'PR': 'Puerto Rico', 'PS': 'Palestine', 'PT': 'Portugal', 'PW': 'Palau',
+    'PY': 'Paraguay', 'QA': 'Qatar', 'RE': 'Reunion', 'RO': 'Romania', 'RS': 'Serbia', 'RU': 'Russia',
+    'RW': 'Rwanda', 'SA': 'Saudi Arabia', 'SB': 'Solomon Islands', 'SC': 'Seychelles', 'SD': 'Sudan',
+    'SE': 'Sweden', 'SG': 'Singapore', 'SH': 'Saint Helena', 'SI': 'Slovenia', 'SJ': 'Svalbard and Jan Mayen',
+    'SK': 'Slovakia', 'SL': 'Sierra Leone', 'SM': 'San Marino', 'SN': 'Senegal', 'SO': 'Somalia',
+    'SR': 'Suriname', 'SS': 'South Sudan', 'ST': 'Sao Tome and Principe', 'SV': 'El Salvador',
+    'SX': 'Sint Maarten', 'SY': 'Syria', 'SZ': 'Eswatini', 'TC': 'Turks and Caicos Islands', 'TD': 'Chad',
+    'TF': 'French Southern Territories', 'TG': 'Togo', 'TH': 'Thailand', 'TJ': 'Tajikistan',
+    'TK': 'Tokelau', 'TL': 'Timor-Leste', 'TM': 'Turkmenistan', 'TN': 'Tunisia', 'TO': 'Tonga',
+    'TR': 'Turkey', 'TT': 'Trinidad and Tobago', 'TV': 'Tuvalu', 'TW': 'Taiwan', 'TZ': 'Tanzania',
+    'UA': 'Ukraine', 'UG': 'Uganda', 'UM': 'United States Minor Outlying Islands', 'US': 'United States',
+    'UY': 'Uruguay', 'UZ': 'Uzbekistan', 'VA': 'Vatican City', 'VC': 'Saint Vincent and the Grenadines',
+    'VE': 'Venezuela', 'VG': 'British Virgin Islands', 'VI': 'U.S. Virgin Islands', 'VN': 'Vietnam',
+    'VU': 'Vanuatu', 'WF': 'Wallis and Futuna', 'WS': 'Samoa', 'XK': 'Kosovo', 'YE': 'Yemen',
+    'YT': 'Mayotte', 'ZA': 'South Africa', 'ZM': 'Zambia', 'ZW': 'Zimbabwe',
+}
+
+# Common names that differ from the official short names above
+COUNTRY_ALIASES = {
+    'usa': 'US', 'united states of america': 'US', 'america': 'US',
+    'uk': 'GB', 'england': 'GB', 'scotland': 'GB', 'wales': 'GB', 'great britain': 'GB',
+    'uae': 'AE', 'russia': 'RU', 'south korea': 'KR', 'north korea': 'KP',
+    'czech republic': 'CZ', 'holland': 'NL', 'vatican': 'VA',
+}
+
+_GAZETTEERS = {}
+
+def normalize_place_name(name):
+    """
+    Normalize a place name for case- and accent-insensitive matching.
+
+    Examples:
+        normalize_place_name('São Paulo') → 'sao paulo'
+        normalize_place_name('Saint-Étienne') → 'saint etienne'
+    """
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    cleaned = ''.join(ch if ch.isalnum() else ' ' for ch in stripped.casefold())
+    return ' '.join(cleaned.split())
+
+def _read_gazetteer_lines(path):
+    """Yield the lines of a GeoNames dump, reading .zip archives directly."""
+    if path.endswith('.zip'):
+        import zipfile
+        with zipfile.ZipFile(path) as archive:
+            member = next(name for name in archive.namelist() if name.endswith('.txt'))
+            with archive.open(member) as f:
+                for line in f:
+                    yield line.decode('utf-8')
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from f
+
+def _load_country_codes(path):
+    """
+    Map normalized country names and ISO codes to ISO 3166 alpha-2 codes.
+
+    Reads GeoNames' countryInfo.txt when it sits next to the gazetteer dump.
+    """
+    countries = {}
+    info_file = os.path.join(os.path.dirname(os.path.abspath(path)), 'countryInfo.txt')
+    if os.path.exists(info_file):
+        with open(info_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('#'):
+                    continue
+                fields = line.rstrip('\n').split('\t')
+                if len(fields) < 5:
+                    continue
+                code = fields[0]
+                for name in (fields[0], fields[1], fields[4]):
+                    countries[normalize_place_name(name)] = code
+    for code, name in COUNTRY_NAMES.items():
+        countries.setdefault(normalize_place_name(name), code)
+        countries.setdefault(code.lower(), code)
+    for alias, code in COUNTRY_ALIASES.items():
+        countries.setdefault(alias, code)
+    return countries
+
+def build_gazetteer_index(path):
+    """
+    Parse a GeoNames cities dump into a compact lookup index.
+
+    Every name, ASCII name and alternate name of a place becomes a normalized
+    key. Keys are sorted, with ties ordered by descending population, so exact
+    lookups stop at the first match and prefix lookups are a contiguous range.
+
+    Args:
+        path (str): GeoNames dump (.txt or .zip) in the standard 19-column format
+
+    Returns:
+        dict: Index with sorted 'keys', the 'rows' they point to, and per-place
+              'names', 'latitude', 'longitude', 'population' and 'country' arrays
+    """
+    names, latitude, longitude, population, country = [], [], [], [], []
+    entries = []
+
+    for line in _read_gazetteer_lines(path):
+        fields = line.rstrip('\n').split('\t')
+        if len(fields) < 15:
+            continue
+        row = len(names)
+        names.append(fields[1])
+        latitude.append(float(fields[4]))
+        longitude.append(float(fields[5]))
+        country.append(fields[8])
+        pop = int(fields[14] or 0)
+        population.append(pop)
+
+        keys = {normalize_place_name(fields[1]), normalize_place_name(fields[2])}
+        keys.update(normalize_place_name(alt) for alt in fields[3].split(',') if alt)
+        keys.discard('')
+        entries.extend((key, -pop, row) for key in keys)
+
+    entries.sort()
+    return {
+        'version': GAZETTEER_INDEX_VERSION,
+        'keys': [key for key, _, _ in entries],
+        'rows': np.array([row for _, _, row in entries], dtype=np.int32),
+        'names': names,
+        'latitude': np.array(latitude, dtype=np.float64),
+        'longitude': np.array(longitude, dtype=np.float64),
+        'population': np.array(population, dtype=np.int64),
+        'country': np.array(country, dtype='U2'),
+        'countries': _load_country_codes(path),
+    }
+
+def load_gazetteer(path):
+    """
+    Load the lookup index for a GeoNames dump, building it on first use.
+
+    The compiled index is cached in memory and pickled to '<path>.index.pkl',
+    and is rebuilt whenever the dump's size or modification time changes.
+    """
+    stat = os.stat(path)
+    source = (stat.st_size, stat.st_mtime)
+    if path in _GAZETTEERS and _GAZETTEERS[path]['source'] == source:
+        return _GAZETTEERS[path]
+
+    index_file = f"{path}.index.pkl"
+    gazetteer = None
+    if os.path.exists(index_file):
+        try:
+            with open(index_file, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('version') == GAZETTEER_INDEX_VERSION and cached.get('source') == source:
+                gazetteer = cached
+        except Exception:
+            gazetteer = None
+
+    if gazetteer is None:
+        print(f"Building gazetteer index for {path}...")
+        gazetteer = build_gazetteer_index(path)
+        gazetteer['source'] = source
+        try:
+            tmp_file = temp_path(index_file)
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(gazetteer, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, index_file)
+        except OSError as e:
+            print(f"⚠ Could not save gazetteer index: {e}")
+
+    _GAZETTEERS[path] = gazetteer
+    return gazetteer
+
+def lookup_gazetteer(gazetteer, city, country=None):
+    """
+    Find the best match for a city in a gazetteer index.
+
+    Exact (case- and accent-insensitive) name matches win; otherwise the most
+    populous place whose name starts with the query is returned. Population
+    breaks ties in both cases.
+
+    Args:
+        gazetteer (dict): Index from load_gazetteer()
+        city (str): City name or name prefix
+        country (str): Country name or ISO code, or None to search everywhere
+
+    Returns:
+        dict: 'name', 'country', 'latitude', 'longitude' and 'population' of the
+              match, or None if nothing matches or the country is not recognized
+    """
+    key = normalize_place_name(city)
+    if not key:
+        return None
+
+    code = None
+    if country:
+        country_key = normalize_place_name(country)
+        code = gazetteer['countries'].get(country_key)
+        if code is None:
+            # Searching everywhere would quietly return a namesake elsewhere
+            print(f"⚠ Unknown country '{country}'")
+            return None
+
+    keys = gazetteer['keys']
+    rows = gazetteer['rows']
+    lo = bisect.bisect_left(keys, key)
+    hi = bisect.bisect_left(keys, key + '\uffff', lo)
+
+    # Exact matches come first in the range, most populous first
+    for i in range(lo, hi):
+        if keys[i] != key:
+            break
+        row = rows[i]
+        if code is None or gazetteer['country'][row] == code:
+            return _gazetteer_match(gazetteer, row)
+
+    # Prefix matches: most populous place in the contiguous key range
+    candidates = rows[lo:hi]
+    if code is not None:
+        candidates = candidates[gazetteer['country'][candidates] == code]
+    if len(candidates) == 0:
+        return None
+    return _gazetteer_match(gazetteer, candidates[np.argmax(gazetteer['population'][candidates])])
+
+def _gazetteer_match(gazetteer, row):
+    """Build the lookup result for one gazetteer row."""
+    return {
+        'name': gazetteer['names'][row],
+        'country': str(gazetteer['country'][row]),
+        'latitude': float(gazetteer['latitude'][row]),
+        'longitude': float(gazetteer['longitude'][row]),
+        'population': int(gazetteer['population'][row]),
+    }
+
+def get_coordinates(city, country, gazetteer=None):
+    """
+    Fetches coordinates for a given city and country using geopy.
+    Requests are rate limited to be respectful to the geocoding service.
+
+    Args:
+        city (str): City name
+        country (str): Country name
+        gazetteer (str): Path to a GeoNames cities dump. When given, the lookup
+                         is done offline instead of through Nominatim.
+    """
+    if gazetteer:
+        print("Looking up coordinates in gazetteer...")
+        match = lookup_gazetteer(load_gazetteer(gazetteer), city, country)
+        if not match:
+            raise ValueError(f"Could not find coordinates for {city}, {country} in {gazetteer}")
+        print(f"✓ Found: {match['name']}, {match['country']}")
+        print(f"✓ Coordinates: {match['latitude']}, {match['longitude']}")
+        return (match['latitude'], match['longitude'])
 
-    location = geolocator.geocode(f"{city}, {country}")
+    print("Looking up coordinates...")
+    # Pacing to Nominatim's usage policy is done by the shared rate limiter
+    location = get_geocoder().geocode(f"{city}, {country}")
 
     if location:
         print(f"✓ Found: {location.address}")
@@ -531,10 +1054,1380 @@ def get_coordinates(city, country):
     else:
         raise ValueError(f"Could not find coordinates for {city}, {country}")
 
-def create_poster(city, country, point, dist, output_file, aspect_ratio=(3, 4), dpi=300, base_width=12, enable_gradients=True, fill=False):
+# --- Geometry-only road fetching ---
+# The poster never routes, so building a graph (topology, simplification,
+# edge lengths) is wasted work. The 'lines' fetch mode asks Overpass for the
+# way geometries directly and keeps them as LineStrings with their highway tag.
+FETCH_MODES = ('graph', 'lines', 'tiled')
+
+# Same ways OSMnx selects for network_type='all'
+ROAD_WAY_FILTER = ('["highway"]["area"!~"yes"]'
+                   '["highway"!~"abandoned|construction|no|planned|platform|proposed|raceway|razed|rest_area|services"]')
+
+# Road classes in the order they're styled, from most to least important.
+# 'default' (None) is every other highway value.
+ROAD_CLASSES = {
+    'motorway': ['motorway', 'motorway_link'],
+    'primary': ['trunk', 'trunk_link', 'primary', 'primary_link'],
+    'secondary': ['secondary', 'secondary_link'],
+    'tertiary': ['tertiary', 'tertiary_link'],
+    'residential': ['residential', 'living_street', 'unclassified'],
+    'default': None,
+}
+
+def road_way_filter(road_classes=None):
+    """
+    Overpass way filter for roads, optionally limited to some road classes.
+
+    Args:
+        road_classes (list): ROAD_CLASSES names to keep, or None for all roads
+
+    Returns:
+        str: Filter such as '["highway"]...["highway"~"^(motorway|...)$"]'
+    """
+    if road_classes is None or 'default' in road_classes:
+        return ROAD_WAY_FILTER
+    values = [value for name in road_classes for value in ROAD_CLASSES[name]]
+    return f'{ROAD_WAY_FILTER}["highway"~"^({"|".join(values)})$"]'
+OVERPASS_TIMEOUT = 180
+
+def overpass_query(query):
+    """
+    Send an Overpass QL query to the configured endpoint.
+
+    Returns:
+        dict: The parsed JSON response
+    """
+    response = http_request('overpass', 'POST', f"{ENDPOINTS['overpass']}/interpreter",
+                            data={'data': query}, timeout=OVERPASS_TIMEOUT + 10)
+    response.raise_for_status()
+    return response.json()
+
+def road_lines_from_overpass(elements):
+    """
+    Build road line geometries from Overpass 'out geom' way elements.
+
+    Vertices outside a bbox-limited output come back as nulls; a way that
+    leaves the bbox and comes back is split there into a MultiLineString
+    rather than joined straight across the gap.
+
+    Returns:
+        GeoDataFrame: 'highway' tag and LineString (or MultiLineString) geometry
+                      per way, indexed by OSM way id
+    """
+    ids, highways, coords, run_lengths, runs_per_way = [], [], [], [], []
+    for element in elements:
+        if element.get('type') != 'way':
+            continue
+        runs = [[]]
+        for p in element.get('geometry', ()):
+            if p:
+                runs[-1].append((p['lon'], p['lat']))
+            elif runs[-1]:
+                runs.append([])
+        runs = [run for run in runs if len(run) >= 2]
+        if not runs:
+            continue
+        ids.append(element['id'])
+        highways.append(element.get('tags', {}).get('highway', 'unclassified'))
+        for run in runs:
+            coords.extend(run)
+            run_lengths.append(len(run))
+        runs_per_way.append(len(runs))
+
+    if not ids:
+        return gpd.GeoDataFrame({'highway': []}, geometry=[], crs='EPSG:4326')
+
+    # Build every LineString in one vectorized call
+    lines = shapely.linestrings(np.array(coords), indices=np.repeat(np.arange(len(run_lengths)), run_lengths))
+    runs_per_way = np.array(runs_per_way)
+    geometry = lines[np.cumsum(runs_per_way) - runs_per_way]  # first run of every way
+    split = runs_per_way > 1
+    if split.any():
+        run_way = np.repeat(np.arange(len(ids)), runs_per_way)
+        in_split = split[run_way]
+        _, parts_index = np.unique(run_way[in_split], return_inverse=True)
+        geometry[split] = shapely.multilinestrings(lines[in_split], indices=parts_index)
+    return gpd.GeoDataFrame({'highway': highways}, geometry=geometry, index=ids, crs='EPSG:4326')
+
+def fetch_road_lines(bbox, road_classes=None):
+    """
+    Download the roads in a bbox as plain line geometries, without a street graph.
+
+    Unlike graph mode, ways crossing the bbox edge and disconnected segments
+    are kept (as in fill mode); anything outside the bbox is clipped by the
+    axis limits when drawing. The bbox only selects ways: their geometry comes
+    back whole, so a way fetched by several tiles is identical in each.
+
+    Args:
+        bbox (dict): Bounding box from calculate_map_bbox()
+        road_classes (list): ROAD_CLASSES names to download, or None for all roads
+
+    Returns:
+        GeoDataFrame: 'highway' tag and LineString geometry per way
+    """
+    # A global [bbox:...] would also clip 'out geom' output to the bbox
+    query = (f"[out:json][timeout:{OVERPASS_TIMEOUT}];"
+             f"way{road_way_filter(road_classes)}"
+             f"({bbox['south']},{bbox['west']},{bbox['north']},{bbox['east']});out geom qt;")
+    return road_lines_from_overpass(overpass_query(query).get('elements', []))
+
+# --- Tiled fetching ---
+# Metro-scale extents make one huge Overpass query that often times out. The
+# 'tiled' fetch mode covers the bbox with tiles from a fixed global grid, so
+# overlapping jobs share tiles, and fetches them concurrently (pacing still
+# comes from the Overpass token bucket). Each tile is cached and retried on
+# its own; results are merged by OSM id so features crossing tile borders
+# appear once. Roads are fetched as geometry-only lines.
+TILE_SIZE = 0.1           # degrees per tile side, on a grid aligned to 0°/0°
+TILE_WORKERS = 4
+TILE_MAX_RETRIES = 3
+TILE_CACHE_DIR = os.path.join("cache", "tiles")
+
+FEATURE_TAGS = {
+    'water': {'natural': 'water', 'waterway': 'riverbank'},
+    'parks': {'leisure': 'park', 'landuse': 'grass'},
+}
+
+def split_bbox(bbox, tile_size=TILE_SIZE):
+    """
+    Cover a bbox with tiles from a global grid.
+
+    Args:
+        bbox (dict): Bounding box from calculate_map_bbox()
+        tile_size (float): Tile side in degrees (default: TILE_SIZE)
+
+    Returns:
+        list: Tile bboxes (dicts with north/south/east/west), row by row
+    """
+    tiles = []
+    for row in range(int(np.floor(bbox['south'] / tile_size)), int(np.ceil(bbox['north'] / tile_size))):
+        for col in range(int(np.floor(bbox['west'] / tile_size)), int(np.ceil(bbox['east'] / tile_size))):
+            tiles.append({
+                'north': round((row + 1) * tile_size, 9),
+                'south': round(row * tile_size, 9),
+                'east': round((col + 1) * tile_size, 9),
+                'west': round(col * tile_size, 9),
+            })
+    return tiles
+
+def _download_tile(layer, tile, road_classes=None):
+    """Download one layer for one tile; an empty result is a GeoDataFrame, not an error."""
+    if layer == 'roads':
+        return fetch_road_lines(tile, road_classes)
+    try:
+        features = ox.features_from_bbox(
+            bbox=(tile['west'], tile['south'], tile['east'], tile['north']),
+            tags=FEATURE_TAGS[layer]
+        )
+    except ox._errors.InsufficientResponseError:
+        return gpd.GeoDataFrame(geometry=[], crs='EPSG:4326')
+    # Tags aren't used for drawing; keep the (element, id) index for deduplication
+    return features[['geometry']]
+
+def fetch_tile(layer, tile, road_classes=None):
+    """
+    Fetch one layer of one tile, from the tile cache when possible.
+
+    Failed downloads are retried up to TILE_MAX_RETRIES times with jittered
+    backoff before the error is raised.
+    """
+    query = road_way_filter(road_classes) if layer == 'roads' else json.dumps(FEATURE_TAGS[layer], sort_keys=True)
+    key = hashlib.sha1(f"{layer}|{query}|{sorted(tile.items())}".encode()).hexdigest()
+    cache_file = os.path.join(TILE_CACHE_DIR, f"{layer}_{key}.pkl")
+
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            pass
+
+    for attempt in range(TILE_MAX_RETRIES + 1):
+        try:
+            gdf = _download_tile(layer, tile, road_classes)
+            break
+        except Exception:
+            if attempt == TILE_MAX_RETRIES:
+                raise
+            time.sleep(_backoff_delay(attempt))
+
+    try:
+        os.makedirs(TILE_CACHE_DIR, exist_ok=True)
+        tmp_file = temp_path(cache_file)
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(gdf, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"⚠ Could not cache {layer} tile: {e}")
+    return gdf
+
+def _join_pieces(geometries):
+    """One geometry from the copies of a feature returned by several tiles."""
+    first = geometries.iloc[0]
+    if all(first.equals_exact(other, 0) for other in geometries.iloc[1:]):
+        return first
+    # Pieces clipped to their tiles: put the feature back together
+    joined = shapely.union_all(geometries.values)
+    return shapely.line_merge(joined) if joined.geom_type == 'MultiLineString' else joined
+
+def merge_tiles(parts, bbox):
+    """
+    Merge per-tile GeoDataFrames, dropping duplicate OSM ids and features outside the bbox.
+
+    Copies of a feature are normally identical and the first is kept; if they
+    differ (geometry clipped per tile), they are joined so the feature isn't
+    cut off at tile borders.
+
+    Returns:
+        GeoDataFrame: Merged layer in tile order, or None if every tile was empty
+    """
+    parts = [part for part in parts if part is not None and not part.empty]
+    if not parts:
+        return None
+    merged = pd.concat(parts)
+    duplicates = merged[merged.index.duplicated(keep=False)]
+    merged = merged[~merged.index.duplicated(keep='first')]
+    if not duplicates.empty:
+        levels = list(range(duplicates.index.nlevels))
+        joined = duplicates.geometry.groupby(level=levels, sort=False).agg(_join_pieces)
+        merged.loc[joined.index, merged.geometry.name] = joined.values
+    return _query_extent(merged, bbox)
+
+def fetch_tiled(bbox, tile_size=TILE_SIZE, workers=TILE_WORKERS, road_classes=None):
+    """
+    Download roads, water and parks for a bbox as concurrently fetched tiles.
+
+    Args:
+        bbox (dict): Bounding box from calculate_map_bbox()
+        tile_size (float): Tile side in degrees (default: TILE_SIZE)
+        workers (int): Concurrent tile downloads (default: TILE_WORKERS)
+        road_classes (list): ROAD_CLASSES names to download, or None for all roads
+
+    Returns:
+        dict: 'roads', 'water' and 'parks' layers, as in fetch_map_data()
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    ensure_endpoints()
+    tiles = split_bbox(bbox, tile_size)
+    jobs = [(layer, tile) for layer in ('roads', 'water', 'parks') for tile in tiles]
+    results = [None] * len(jobs)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, \
+            tqdm(total=len(jobs), desc=f"Downloading {len(tiles)} tiles", unit="tile") as pbar:
+        futures = {pool.submit(fetch_tile, layer, tile, road_classes): i for i, (layer, tile) in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            layer = jobs[i][0]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                # Roads are essential; a missing water/park tile only leaves a gap
+                if layer == 'roads':
+                    raise
+                print(f"⚠ Skipping {layer} tile after {TILE_MAX_RETRIES} retries: {e}")
+            pbar.update(1)
+
+    # Merge in job order so the drawing order doesn't depend on download timing
+    layers = {}
+    for name in ('roads', 'water', 'parks'):
+        parts = [results[i] for i, (layer, _) in enumerate(jobs) if layer == name]
+        layers[name] = merge_tiles(parts, bbox)
+    if layers['roads'] is None:
+        layers['roads'] = gpd.GeoDataFrame({'highway': []}, geometry=[], crs='EPSG:4326')
+    return layers
+
+# --- Cost estimation and budgets ---
+# Before fetching, the job's size is predicted from road/feature densities:
+# observed densities cached per grid cell from earlier runs, a cheap Overpass
+# count query, or priors for a dense city core. With a memory/time budget the
+# job is degraded step by step (lighter fetch mode, tiling, simplified roads,
+# fewer road classes) until the estimate fits, or rejected before any download.
+DENSITY_FILE = os.path.join("cache", "density.json")
+DENSITY_CELL = 0.25  # degrees; observed densities are kept per grid cell
+_DENSITY_LOCK = threading.Lock()
+
+# Priors per km² for an unknown area (a dense European/US city core)
+DEFAULT_DENSITY = {
+    'ways': {'motorway': 1.5, 'primary': 4, 'secondary': 5, 'tertiary': 7, 'residential': 35, 'default': 70},
+    'vertices_per_way': 9,
+    'features': 12,
+    'vertices_per_feature': 40,
+}
+
+# Rough cost model, calibrated on 2-29 km posters; tune it to your hardware
+COST_MODEL = {
+    'bytes_per_vertex': {'graph': 110, 'lines': 48, 'tiled': 48},   # Overpass JSON on the wire
+    'edges_per_way': 2.5,          # graph mode splits ways at intersections
+    'memory_per_edge': {'graph': 4000, 'lines': 700, 'tiled': 700},  # bytes incl. GeoDataFrame row
+    'memory_per_vertex': 64,
+    'memory_per_pixel': 12,        # Agg buffer plus PNG encoding copies
+    'json_memory_factor': 4.0,     # parsed JSON relative to bytes downloaded
+    'base_memory': 250e6,          # interpreter, libraries, fonts
+    'download_rate': 1.5e6,        # bytes/s from one Overpass query
+    'cpu_per_edge': {'graph': 400e-6, 'lines': 15e-6, 'tiled': 15e-6},  # seconds
+    'render_per_vertex': 1.2e-6,
+    'render_per_pixel': 60e-9,
+    'simplified_vertex_factor': 0.4,
+}
+TILED_DOWNLOAD_THRESHOLD = 60e6  # bytes; single queries larger than this tend to time out
+
+# Road classes dropped, in order, when a job doesn't fit its budget
+DEGRADABLE_ROAD_CLASSES = ['default', 'residential', 'tertiary']
+
+def bbox_area_km2(bbox):
+    """Approximate area of a bbox in square kilometers."""
+    cos_lat = np.cos(np.deg2rad((bbox['south'] + bbox['north']) / 2))
+    return (bbox['north'] - bbox['south']) * 111.0 * (bbox['east'] - bbox['west']) * 111.0 * cos_lat
+
+def _density_cell(bbox):
+    """Key of the density grid cell containing the bbox center."""
+    lat = (bbox['south'] + bbox['north']) / 2
+    lon = (bbox['west'] + bbox['east']) / 2
+    return f"{int(np.floor(lat / DENSITY_CELL))}_{int(np.floor(lon / DENSITY_CELL))}"
+
+def _load_density_stats():
+    """Observed densities from DENSITY_FILE, or an empty dict."""
+    try:
+        with open(DENSITY_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def lookup_density(bbox):
+    """
+    Densities for the area of a bbox.
+
+    Returns:
+        tuple: (density dict shaped like DEFAULT_DENSITY, source) where source
+               is 'cached' for densities observed nearby, or 'prior'
+    """
+    stats = _load_density_stats().get(_density_cell(bbox))
+    if stats:
+        return stats, 'cached'
+    return DEFAULT_DENSITY, 'prior'
+
+def record_density(data, fetch_mode='graph'):
+    """
+    Store the densities observed in a complete download for later estimates.
+
+    Keeps a running mean (over the last few runs) per DENSITY_CELL grid cell.
+    """
+    bbox = data['bbox']
+    area = bbox_area_km2(bbox)
+    roads = data['roads']
+    if area <= 0 or roads is None or roads.empty:
+        return
+
+    edges_per_way = COST_MODEL['edges_per_way'] if fetch_mode == 'graph' else 1
+    # Classified exactly as for drawing, so budgets drop the roads that are drawn as such
+    counts = np.bincount(road_style_indices(roads['highway']), minlength=len(ROAD_CLASSES))
+    classes = dict(zip(ROAD_CLASSES, counts))
+    features = [gdf for gdf in (data['water'], data['parks']) if gdf is not None and not gdf.empty]
+    feature_count = sum(len(gdf) for gdf in features)
+    observed = {
+        'ways': {name: float(classes.get(name, 0)) / edges_per_way / area for name in ROAD_CLASSES},
+        'vertices_per_way': float(shapely.get_num_coordinates(roads.geometry.values).mean()) * edges_per_way,
+        'features': feature_count / area,
+        'vertices_per_feature': (float(np.mean([shapely.get_num_coordinates(gdf.geometry.values).mean()
+                                                for gdf in features]))
+                                 if features else DEFAULT_DENSITY['vertices_per_feature']),
+    }
+
+    # Read-modify-write of the shared file; batch fetch threads record concurrently
+    with _DENSITY_LOCK:
+        all_stats = _load_density_stats()
+        key = _density_cell(bbox)
+        previous = all_stats.get(key)
+        if previous:
+            n = min(previous.get('runs', 1), 9)
+            blend = lambda old, new: (old * n + new) / (n + 1)
+            observed = {
+                'ways': {name: blend(previous['ways'].get(name, 0), value) for name, value in observed['ways'].items()},
+                'vertices_per_way': blend(previous['vertices_per_way'], observed['vertices_per_way']),
+                'features': blend(previous['features'], observed['features']),
+                'vertices_per_feature': blend(previous['vertices_per_feature'], observed['vertices_per_feature']),
+            }
+            observed['runs'] = previous.get('runs', 1) + 1
+        else:
+            observed['runs'] = 1
+        all_stats[key] = observed
+
+        try:
+            os.makedirs(os.path.dirname(DENSITY_FILE), exist_ok=True)
+            tmp_file = temp_path(DENSITY_FILE)
+            with open(tmp_file, 'w') as f:
+                json.dump(all_stats, f)
+            os.replace(tmp_file, DENSITY_FILE)
+        except OSError as e:
+            print(f"⚠ Could not save density statistics: {e}")
+
+def count_map_features(bbox):
+    """
+    Count roads per class and water/park features with one cheap Overpass query.
+
+    Returns:
+        dict: {'ways': {class: count}, 'features': count}
+    """
+    statements = []
+    named = [value for values in ROAD_CLASSES.values() if values for value in values]
+    for name, values in ROAD_CLASSES.items():
+        if values:
+            statements.append(f'way{ROAD_WAY_FILTER}["highway"~"^({"|".join(values)})$"];out count;')
+        else:
+            statements.append(f'way{ROAD_WAY_FILTER}["highway"!~"^({"|".join(named)})$"];out count;')
+    feature_filters = ''.join(f'wr["{key}"="{value}"];' for tags in FEATURE_TAGS.values()
+                              for key, value in tags.items())
+    statements.append(f'({feature_filters});out count;')
+
+    query = (f"[out:json][timeout:{OVERPASS_TIMEOUT}]"
+             f"[bbox:{bbox['south']},{bbox['west']},{bbox['north']},{bbox['east']}];"
+             + ''.join(statements))
+    counts = [int(element['tags']['total']) for element in overpass_query(query).get('elements', [])
+              if element.get('type') == 'count']
+    if len(counts) != len(ROAD_CLASSES) + 1:
+        raise ValueError("Unexpected response to Overpass count query")
+    return {'ways': dict(zip(ROAD_CLASSES, counts)), 'features': counts[-1]}
+
+def estimate_job_cost(bbox, figsize, dpi, fetch_mode='graph', road_classes=None, simplify=False, counts=None):
+    """
+    Predict the size, peak memory and run time of a poster job before fetching.
+
+    Args:
+        bbox (dict): Bounding box from calculate_map_bbox()
+        figsize (tuple): (width, height) in inches
+        dpi (int): Output resolution
+        fetch_mode (str): 'graph', 'lines' or 'tiled' (default: 'graph')
+        road_classes (list): ROAD_CLASSES names to fetch, or None for all roads
+        simplify (bool): Whether roads are simplified to pixel accuracy (default: False)
+        counts (dict): Exact counts from count_map_features(), if available
+
+    Returns:
+        dict: 'ways', 'edges', 'vertices', 'features', 'download_bytes',
+              'peak_memory' (bytes), 'seconds' and 'source' of the densities
+    """
+    area = bbox_area_km2(bbox)
+    density, source = lookup_density(bbox)
+    kept = list(ROAD_CLASSES) if road_classes is None else road_classes
+
+    if counts:
+        ways = sum(counts['ways'][name] for name in kept)
+        features = counts['features']
+        source = 'count query'
+    else:
+        ways = sum(density['ways'].get(name, 0) for name in kept) * area
+        features = density['features'] * area
+
+    model = COST_MODEL
+    vertices = ways * density['vertices_per_way']
+    feature_vertices = features * density['vertices_per_feature']
+    edges = ways * model['edges_per_way'] if fetch_mode == 'graph' else ways
+    download = (vertices + feature_vertices) * model['bytes_per_vertex'][fetch_mode]
+    drawn_vertices = vertices * (model['simplified_vertex_factor'] if simplify else 1)
+    pixels = figsize[0] * dpi * figsize[1] * dpi
+
+    peak_memory = (model['base_memory']
+                   + download * model['json_memory_factor']
+                   + edges * model['memory_per_edge'][fetch_mode]
+                   + (vertices + feature_vertices) * model['memory_per_vertex']
+                   + pixels * model['memory_per_pixel'])
+    fetch_seconds = download / model['download_rate']
+    if fetch_mode == 'tiled':
+        # Parallel tile downloads are still paced by the Overpass token bucket:
+        # one request per layer and tile
+        tiles = len(split_bbox(bbox))
+        fetch_seconds = max(fetch_seconds / min(TILE_WORKERS, tiles),
+                            tiles * 3 / RATE_LIMITS['overpass'][0])
+    seconds = (fetch_seconds
+               + edges * model['cpu_per_edge'][fetch_mode]
+               + (drawn_vertices + feature_vertices) * model['render_per_vertex']
+               + pixels * model['render_per_pixel'])
+
+    return {
+        'area_km2': area,
+        'ways': int(ways),
+        'edges': int(edges),
+        'vertices': int(vertices),
+        'features': int(features),
+        'download_bytes': download,
+        'peak_memory': peak_memory,
+        'seconds': seconds,
+        'source': source,
+    }
+
+def print_estimate(estimate):
+    """Print a cost estimate in human-readable units."""
+    print(f"Estimate ({estimate['source']}): {estimate['area_km2']:.0f} km², "
+          f"{estimate['ways']:,} roads ({estimate['edges']:,} edges), {estimate['features']:,} features")
+    print(f"  Download ~{estimate['download_bytes'] / 1e6:.0f} MB, "
+          f"peak memory ~{estimate['peak_memory'] / 1e6:.0f} MB, "
+          f"time ~{estimate['seconds']:.0f} s")
+
+def plan_job(bbox, figsize, dpi, fetch_mode='graph', max_memory=None, max_time=None, count_query=False):
+    """
+    Choose the most detailed fetch plan whose estimate fits a budget.
+
+    Degradation steps, applied in order until the job fits: switch graph to
+    lines fetching, tile downloads too large for one query, simplify roads to
+    pixel accuracy, then drop minor road classes (DEGRADABLE_ROAD_CLASSES).
+
+    Args:
+        bbox (dict): Bounding box from calculate_map_bbox()
+        figsize (tuple): (width, height) in inches
+        dpi (int): Output resolution
+        fetch_mode (str): Requested fetch mode (default: 'graph')
+        max_memory (float): Peak memory budget in bytes, or None
+        max_time (float): Run time budget in seconds, or None
+        count_query (bool): Count features with Overpass instead of using densities
+
+    Returns:
+        dict: 'fetch_mode', 'road_classes' (None for all), 'simplify',
+              'estimate' and the list of 'degraded' steps taken
+
+    Raises:
+        ValueError: If even the most degraded plan exceeds the budget
+    """
+    counts = count_map_features(bbox) if count_query else None
+    plan = {'fetch_mode': fetch_mode, 'road_classes': None, 'simplify': False, 'degraded': []}
+
+    def estimate():
+        return estimate_job_cost(bbox, figsize, dpi, plan['fetch_mode'], plan['road_classes'],
+                                 plan['simplify'], counts)
+
+    def fits(cost):
+        return ((max_memory is None or cost['peak_memory'] <= max_memory)
+                and (max_time is None or cost['seconds'] <= max_time))
+
+    steps = []
+    if fetch_mode == 'graph':
+        steps.append(('lines fetch mode', lambda: plan.update(fetch_mode='lines')))
+    steps.append(('tiled fetching', lambda: plan.update(fetch_mode='tiled')))
+    steps.append(('simplified roads', lambda: plan.update(simplify=True)))
+    kept = list(ROAD_CLASSES)
+    for name in DEGRADABLE_ROAD_CLASSES:
+        kept = [c for c in kept if c != name]
+        steps.append((f"without {name} roads", lambda kept=kept: plan.update(road_classes=kept)))
+
+    cost = estimate()
+    for description, apply in steps:
+        if fits(cost):
+            break
+        # Tiling only helps when one query would be too large to download reliably
+        if description == 'tiled fetching' and cost['download_bytes'] < TILED_DOWNLOAD_THRESHOLD:
+            continue
+        apply()
+        plan['degraded'].append(description)
+        cost = estimate()
+
+    plan['estimate'] = cost
+    if not fits(cost):
+        raise ValueError(
+            f"Job exceeds its budget even at the lowest detail "
+            f"(~{cost['peak_memory'] / 1e6:.0f} MB, ~{cost['seconds']:.0f} s). "
+            f"Reduce --distance or --dpi, or raise the budget.")
+    return plan
+
+def fetch_map_data(point, dist, aspect_ratio=(3, 4), fill=False, fetch_mode='graph', road_classes=None):
+    """
+    Download every map layer for the area around a point.
+
+    Args:
+        point (tuple): (latitude, longitude) center point
+        dist (int): Base distance in meters for map coverage
+        aspect_ratio (tuple): (width, height) ratio (default: (3, 4) for poster)
+        fill (bool): If True, keeps roads that cross the bbox edges (default: False)
+        fetch_mode (str): 'graph' builds an OSMnx street graph; 'lines' downloads
+                          road geometries only, which is much cheaper; 'tiled' fetches
+                          lines and features as concurrent grid tiles (default: 'graph')
+        road_classes (list): ROAD_CLASSES names to download, or None for all roads
+
+    Returns:
+        dict: Map data with keys 'bbox', 'roads' (GeoDataFrame of edge geometries
+              with their 'highway' tag), 'water' and 'parks' (GeoDataFrames, or
+              None if the download failed)
+    """
+    ensure_endpoints()
+    # Calculate map bounding box based on aspect ratio
+    bbox = calculate_map_bbox(point, dist, aspect_ratio, fill=fill)
+
+    if fetch_mode == 'tiled':
+        layers = fetch_tiled(bbox, road_classes=road_classes)
+        roads, water, parks = layers['roads'], layers['water'], layers['parks']
+    else:
+        # Progress bar for data fetching
+        with tqdm(total=3, desc="Fetching map data", unit="step", bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt}') as pbar:
+            # 1. Fetch Street Network using bbox
+            # OSMnx 2.0 API: bbox parameter is (west, south, east, north)
+            # Fill mode parameters ensure we get ALL roads within bbox, including disconnected segments
+            pbar.set_description("Downloading street network")
+            if fetch_mode == 'lines':
+                roads = fetch_road_lines(bbox, road_classes)
+            else:
+                G = ox.graph_from_bbox(
+                    bbox=(bbox['west'], bbox['south'], bbox['east'], bbox['north']),
+                    network_type='all',
+                    custom_filter=None if road_classes is None else road_way_filter(road_classes),
+                    truncate_by_edge=fill,  # Extend beyond bbox edges in fill mode
+                    retain_all=fill  # Keep disconnected road segments in fill mode
+                )
+                roads = ox.graph_to_gdfs(G, nodes=False)[['highway', 'geometry']]
+            pbar.update(1)
+
+            # 2. Fetch Water Features using bbox
+            pbar.set_description("Downloading water features")
+            try:
+                water = ox.features_from_bbox(
+                    bbox=(bbox['west'], bbox['south'], bbox['east'], bbox['north']),
+                    tags=FEATURE_TAGS['water']
+                )
+            except:
+                water = None
+            pbar.update(1)
+
+            # 3. Fetch Parks using bbox
+            pbar.set_description("Downloading parks/green spaces")
+            try:
+                parks = ox.features_from_bbox(
+                    bbox=(bbox['west'], bbox['south'], bbox['east'], bbox['north']),
+                    tags=FEATURE_TAGS['parks']
+                )
+            except:
+                parks = None
+            pbar.update(1)
+        
+    print("✓ All data downloaded successfully!")
+    return {'bbox': bbox, 'roads': roads, 'water': water, 'parks': parks}
+
+# --- Polygon layer preprocessing ---
+# OSM returns water and parks as a mix of points, lines and thousands of small
+# adjacent polygons. Before drawing, each layer is reduced to its areal parts,
+# dissolved, and stripped of detail smaller than an output pixel. Results are
+# cached on disk per dataset and resolution.
+LAYER_CACHE_DIR = os.path.join("cache", "layers")
+LAYER_CACHE_VERSION = 2  # bump when preprocess_polygons() output changes
+
+def map_pixel_size(bbox, figsize, dpi):
+    """
+    Size of one output pixel in degrees for a bbox drawn on a figure.
+
+    Returns:
+        tuple: (pixel_lon, pixel_lat) in degrees, taking the latitude-corrected
+               aspect ratio into account. Uses the finer of the two axes' scales
+               so that nothing visible is ever dropped.
+    """
+    cos_lat = np.cos(np.deg2rad((bbox['south'] + bbox['north']) / 2))
+    scale_lat = (bbox['north'] - bbox['south']) / (figsize[1] * dpi)
+    scale_lon = (bbox['east'] - bbox['west']) / (figsize[0] * dpi)
+    pixel_lat = min(scale_lat, scale_lon * cos_lat)
+    return (pixel_lat / cos_lat, pixel_lat)
+
+def _polygon_parts(geoms):
+    """
+    Flatten geometries into their Polygons.
+
+    make_valid() can return nested collections such as
+    GeometryCollection(MultiPolygon, LineString), and get_parts() only
+    unpacks one level, so keep unpacking until no collections are left.
+    """
+    parts = shapely.get_parts(geoms)
+    while np.any(shapely.get_type_id(parts) >= 4):
+        parts = shapely.get_parts(parts)
+    return parts[shapely.get_type_id(parts) == 3]
+
+def preprocess_polygons(gdf, pixel_size):
+    """
+    Reduce a feature layer to a single dissolved, pixel-accurate multipolygon.
+
+    Args:
+        gdf (GeoDataFrame): Features as returned by ox.features_from_bbox()
+        pixel_size (tuple): (pixel_lon, pixel_lat) from map_pixel_size()
+
+    Returns:
+        GeoDataFrame: One MultiPolygon row, or None if the layer has no areas
+                      larger than a pixel
+    """
+    if gdf is None or gdf.empty:
+        return None
+
+    geoms = gdf.geometry.values
+    areas = _polygon_parts(shapely.make_valid(geoms[shapely.get_type_id(geoms) >= 3]))
+    if len(areas) == 0:
+        return None
+
+    # Dissolve, then simplify to half a pixel and drop sub-pixel slivers
+    pixel_lon, pixel_lat = pixel_size
+    dissolved = shapely.union_all(areas)
+    simplified = shapely.simplify(dissolved, pixel_lat / 2, preserve_topology=True)
+    parts = _polygon_parts(simplified)
+    parts = parts[shapely.area(parts) >= pixel_lon * pixel_lat]
+    if len(parts) == 0:
+        return None
+
+    return gpd.GeoDataFrame(geometry=[shapely.MultiPolygon(list(parts))], crs=gdf.crs)
+
+def prepare_polygon_layer(name, gdf, pixel_size):
+    """
+    Cached preprocess_polygons(): reuse the result for identical data and resolution.
+
+    The cache key hashes the layer name, LAYER_CACHE_VERSION, the pixel size and
+    the WKB of every input geometry, so a changed download never reuses a stale result.
+    """
+    if gdf is None or gdf.empty:
+        return None
+
+    digest = hashlib.sha1(f"{name}:{LAYER_CACHE_VERSION}".encode())
+    digest.update(np.asarray(pixel_size, dtype=np.float64).round(12).tobytes())
+    for wkb in shapely.to_wkb(gdf.geometry.values):
+        digest.update(wkb)
+    cache_file = os.path.join(LAYER_CACHE_DIR, f"{name}_{digest.hexdigest()}.pkl")
+
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            pass
+
+    layer = preprocess_polygons(gdf, pixel_size)
+    try:
+        os.makedirs(LAYER_CACHE_DIR, exist_ok=True)
+        tmp_file = temp_path(cache_file)
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(layer, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"⚠ Could not cache {name} layer: {e}")
+    return layer
+
+def prepare_map_data(data, figsize, dpi, simplify_roads=False):
+    """
+    Preprocess the polygon layers of fetched map data for a given output size.
+
+    Args:
+        data (dict): Map data as returned by fetch_map_data()
+        figsize (tuple): (width, height) in inches
+        dpi (int): Output resolution
+        simplify_roads (bool): Also simplify road lines to half a pixel (default: False)
+
+    Returns:
+        dict: A copy of `data` with 'water' and 'parks' dissolved and simplified
+    """
+    pixel_size = map_pixel_size(data['bbox'], figsize, dpi)
+    prepared = dict(data)
+    for name in ('water', 'parks'):
+        prepared[name] = prepare_polygon_layer(name, data[name], pixel_size)
+    roads = data['roads']
+    if simplify_roads and roads is not None and not roads.empty:
+        prepared['roads'] = roads.set_geometry(roads.geometry.simplify(pixel_size[1] / 2))
+    return prepared
+
+# --- Theme registry ---
+# Themes are read from themes/ once, validated, and compiled: colors become
+# RGBA tuples, and road colors and widths are packed into arrays indexed by
+# road class, so drawing never parses hex strings per artist. With watch=True
+# (for long-running services) changed theme files are picked up on access.
+THEME_COLOR_KEYS = ('bg', 'text', 'gradient_color', 'water', 'parks',
+                    'road_motorway', 'road_primary', 'road_secondary',
+                    'road_tertiary', 'road_residential', 'road_default')
+
+# Line width per ROAD_CLASSES entry: major roads get thicker lines
+ROAD_WIDTHS = {'motorway': 1.2, 'primary': 1.0, 'secondary': 0.8, 'tertiary': 0.6,
+               'residential': 0.4, 'default': 0.4}
+
+# Index into a compiled theme's road arrays, per OSM highway tag
+_ROAD_STYLE_INDEX = {value: index for index, values in enumerate(ROAD_CLASSES.values())
+                     for value in values or []}
+_ROAD_STYLE_DEFAULT = list(ROAD_CLASSES).index('default')
+
+class CompiledTheme(dict):
+    """
+    A theme dict made by compile_theme().
+
+    JSON never produces one, so the type (which survives pickling to worker
+    processes) marks a theme as validated; plain dicts are always checked.
+    """
+
+def validate_theme(theme):
+    """
+    Check a theme dict against the theme schema.
+
+    Returns:
+        list: Problems found (missing keys, invalid colors), empty if valid
+    """
+    if not isinstance(theme, dict):
+        return ["theme must be a JSON object"]
+    problems = []
+    missing = [key for key in THEME_COLOR_KEYS if key not in theme]
+    if missing:
+        problems.append(f"missing key(s): {', '.join(missing)}")
+    for key in THEME_COLOR_KEYS:
+        if key in theme and not mcolors.is_color_like(theme[key]):
+            problems.append(f"invalid color for '{key}': {theme[key]!r}")
+    for key in ('name', 'description'):
+        if key in theme and not isinstance(theme[key], str):
+            problems.append(f"'{key}' must be a string")
+    return problems
+
+def compile_theme(theme, source="theme"):
+    """
+    Validate a theme dict and precompute its colors for drawing.
+
+    Args:
+        theme (dict): Theme as loaded from JSON
+        source (str): Where the theme came from, for error messages
+
+    Returns:
+        CompiledTheme: The theme with colors as RGBA tuples, plus 'road_colors'
+                       ((classes, 4) array) and 'road_widths' arrays indexed like
+                       ROAD_CLASSES. Compiling a compiled theme returns it unchanged.
+
+    Raises:
+        ValueError: If the theme is missing keys or has invalid colors
+    """
+    if isinstance(theme, CompiledTheme):
+        return theme
+    problems = validate_theme(theme)
+    if problems:
+        raise ValueError(f"Invalid {source}: {'; '.join(problems)}")
+
+    compiled = CompiledTheme(theme)
+    for key in THEME_COLOR_KEYS:
+        compiled[key] = mcolors.to_rgba(theme[key])
+    compiled['road_colors'] = np.array([compiled[f'road_{name}'] for name in ROAD_CLASSES])
+    compiled['road_widths'] = np.array([ROAD_WIDTHS[name] for name in ROAD_CLASSES])
+    return compiled
+
+def road_style_indices(highway):
+    """
+    Road class index (into a compiled theme's road arrays) for each highway tag.
+
+    Lists use their first value; missing tags are styled as residential roads,
+    unknown ones as default roads. Cost estimates count roads per class with
+    the same tables, so budgets drop exactly the roads drawn in that class.
+
+    Args:
+        highway (pd.Series): 'highway' column of a roads GeoDataFrame
+    """
+    residential = _ROAD_STYLE_INDEX['residential']
+
+    def index(value):
+        if isinstance(value, str):
+            return _ROAD_STYLE_INDEX.get(value, _ROAD_STYLE_DEFAULT)
+        return residential
+
+    # Classify each distinct tag once rather than every edge
+    try:
+        codes, uniques = pd.factorize(highway, use_na_sentinel=False)
+    except TypeError:
+        # Lists (from OSMnx graph simplification) aren't hashable; use their first tag
+        first = pd.Series([(value[0] if value else None) if isinstance(value, list) else value
+                           for value in highway], dtype=object)
+        codes, uniques = pd.factorize(first, use_na_sentinel=False)
+    table = np.array([index(value) for value in uniques], dtype=np.intp)
+    return table[codes]
+
+class ThemeRegistry:
+    """
+    All themes in a directory, loaded, validated and compiled once.
+
+    Invalid theme files don't break the others: they are left out of names()
+    and their problems are kept in `errors`. refresh() builds new tables and
+    swaps them in, so threads reading themes never see them half-updated.
+
+    Args:
+        themes_dir (str): Directory of theme JSON files (default: THEMES_DIR)
+        watch (bool): Reload added, changed or removed files when themes are
+                      accessed, at most every poll_interval seconds (default: False)
+        poll_interval (float): Seconds between checks in watch mode (default: 1.0)
+    """
+
+    def __init__(self, themes_dir=THEMES_DIR, watch=False, poll_interval=1.0):
+        self.themes_dir = themes_dir
+        self.watch = watch
+        self.poll_interval = poll_interval
+        self._tables = ({}, {})  # (themes, errors), replaced together
+        self._mtimes = {}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.refresh()
+
+    @property
+    def themes(self):
+        """Compiled theme per name, for the valid theme files."""
+        return self._tables[0]
+
+    @property
+    def errors(self):
+        """Error message per name, for the invalid theme files."""
+        return self._tables[1]
+
+    def _scan(self):
+        """Modification time per theme name, for every JSON file in the directory."""
+        try:
+            entries = list(os.scandir(self.themes_dir))
+        except FileNotFoundError:
+            return {}
+        return {entry.name[:-5]: entry.stat().st_mtime_ns for entry in entries
+                if entry.name.endswith('.json') and entry.is_file()}
+
+    def refresh(self):
+        """Load new or changed theme files and forget removed ones."""
+        with self._lock:
+            mtimes = self._scan()
+            themes, errors = dict(self.themes), dict(self.errors)
+            for name in set(self._mtimes) - set(mtimes):
+                themes.pop(name, None)
+                errors.pop(name, None)
+            for name, mtime in mtimes.items():
+                if self._mtimes.get(name) == mtime:
+                    continue
+                path = os.path.join(self.themes_dir, f"{name}.json")
+                try:
+                    with open(path, 'r') as f:
+                        theme = json.load(f)
+                    themes[name] = compile_theme(theme, source=f"theme file '{path}'")
+                    errors.pop(name, None)
+                except (OSError, json.JSONDecodeError) as e:
+                    themes.pop(name, None)
+                    errors[name] = f"Invalid theme file '{path}': {e}"
+                except ValueError as e:
+                    # Schema problems; the message already names the file
+                    themes.pop(name, None)
+                    errors[name] = str(e)
+            self._tables = (themes, errors)
+            self._mtimes = mtimes
+            self._checked = time.monotonic()
+
+    def _check(self):
+        if self.watch and time.monotonic() - self._checked >= self.poll_interval:
+            self.refresh()
+
+    def names(self):
+        """Sorted names of the valid themes."""
+        self._check()
+        return sorted(self.themes)
+
+    def get(self, name):
+        """
+        Compiled theme by name.
+
+        Raises:
+            ValueError: If the theme doesn't exist or its file is invalid
+        """
+        self._check()
+        themes, errors = self._tables
+        if name in themes:
+            return themes[name]
+        if name in errors:
+            raise ValueError(errors[name])
+        raise ValueError(f"Theme '{name}' not found in '{self.themes_dir}'")
+
+_THEME_LOCK = threading.Lock()
+_THEME_REGISTRY = None
+
+def get_theme_registry(watch=False):
+    """
+    The shared ThemeRegistry for THEMES_DIR, created on first use.
+
+    Args:
+        watch (bool): Turn on watch mode for the shared registry; it stays on
+                      for every later caller (default: False)
+    """
+    global _THEME_REGISTRY
+    with _THEME_LOCK:
+        if _THEME_REGISTRY is None:
+            _THEME_REGISTRY = ThemeRegistry(THEMES_DIR, watch=watch)
+        elif watch:
+            _THEME_REGISTRY.watch = True
+    return _THEME_REGISTRY
+
+def polygon_path(geometries):
+    """
+    Pack every polygon of a layer into one compound Path, built with array operations.
+
+    Exteriors and holes become MOVETO ... CLOSEPOLY runs of a single vertex
+    array. Rings are oriented (exteriors counter-clockwise, holes clockwise)
+    so matplotlib's nonzero fill leaves holes empty. Parts that aren't
+    polygons (points, lines) are skipped; prepare_map_data() drops them anyway.
+
+    Args:
+        geometries (GeoSeries or array): Layer geometries
+
+    Returns:
+        Path: Compound path of all rings, or None if there are no polygons
+    """
+    parts = shapely.get_parts(np.asarray(geometries, dtype=object))
+    polygons = parts[shapely.get_type_id(parts) == 3]  # Polygon
+    polygons = polygons[~shapely.is_empty(polygons)]
+    if len(polygons) == 0:
+        return None
+
+    rings = shapely.get_rings(shapely.orient_polygons(polygons))
+    vertices = shapely.get_coordinates(rings)
+    counts = shapely.get_num_coordinates(rings)
+    ends = np.cumsum(counts)
+    codes = np.full(len(vertices), Path.LINETO, dtype=Path.code_type)
+    codes[ends - counts] = Path.MOVETO
+    codes[ends - 1] = Path.CLOSEPOLY
+    return Path(vertices, codes)
+
+def plot_polygons(ax, gdf, color, zorder):
+    """
+    Draw a polygon layer as a single filled compound path.
+
+    Replaces gdf.plot(), which builds one patch per polygon in Python, with
+    the same look: a filled, antialiased area without an outline.
+    """
+    if gdf is None or gdf.empty:
+        return
+    path = polygon_path(gdf.geometry.values)
+    if path is None:
+        return
+    # A collection is drawn in data coordinates without walking the path for
+    # data limits (the view is set from the bbox anyway)
+    ax.add_collection(PathCollection([path], facecolors=[color], edgecolors='none',
+                                     linewidths=0, zorder=zorder), autolim=False)
+
+def plot_roads(ax, roads, bbox, theme=None):
+    """
+    Draw roads with hierarchy coloring and lock the axes to the bbox.
+
+    Matches the styling ox.plot_graph applied: edges at zorder 1, hidden
+    spines and ticks, and an aspect ratio corrected for latitude.
+    """
+    if roads is not None and not roads.empty:
+        theme = compile_theme(THEME if theme is None else theme)
+        styles = road_style_indices(roads['highway'])
+        roads.geometry.plot(ax=ax, color=theme['road_colors'][styles],
+                            lw=theme['road_widths'][styles], zorder=1)
+
+    ax.margins(0)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    ax.get_xaxis().set_visible(False)
+    ax.get_yaxis().set_visible(False)
+
+    # Unprojected lat/lon: scale by latitude so the map isn't stretched
+    cos_lat = np.cos(np.deg2rad((bbox['south'] + bbox['north']) / 2))
+    ax.set_aspect(1 / cos_lat)
+
+    # Lock axis limits to bbox to ensure consistent scale
+    # This prevents auto-scaling when truncate_by_edge adds roads beyond bbox
+    ax.set_xlim(bbox['west'], bbox['east'])
+    ax.set_ylim(bbox['south'], bbox['north'])
+
+def new_poster_figure(figsize, dpi):
+    """A Figure with an Agg canvas (no pyplot) and one Axes covering all of it."""
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_position([0, 0, 1, 1])
+    return fig, ax
+
+class FigurePool:
+    """
+    Prepared poster Figures kept per (figsize, dpi) and reused between renders.
+
+    A reused figure keeps its Axes, canvas and Agg renderer, which also keeps
+    matplotlib's text layout cache (keyed by renderer) warm from one poster to
+    the next. Each render checks a figure out exclusively, so one pool can be
+    shared by several threads.
+
+    Args:
+        max_idle (int): Idle figures kept per (figsize, dpi) (default: 2)
+    """
+
+    def __init__(self, max_idle=2):
+        self.max_idle = max_idle
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, figsize, dpi):
+        """A cleared (Figure, Axes) pair for the given size, reused if one is idle."""
+        key = (tuple(figsize), dpi)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+        return new_poster_figure(figsize, dpi)
+
+    def release(self, figsize, dpi, fig, ax):
+        """Clear a figure's poster artists and return it to the pool."""
+        # Removing the artists is much cheaper than ax.clear(), which rebuilds
+        # the axis machinery; the view is reset by every render anyway
+        for artist in [*ax.collections, *ax.patches, *ax.lines, *ax.texts, *ax.images]:
+            artist.remove()
+        ax.ignore_existing_data_limits = True
+        key = (tuple(figsize), dpi)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append((fig, ax))
+
+@functools.lru_cache(maxsize=64)
+def _font_properties(path, weight, size):
+    """Cached FontProperties for a font file, or the monospace fallback when path is None."""
+    if path:
+        return FontProperties(fname=path, size=size)
+    # Fallback to system fonts
+    return FontProperties(family='monospace', weight='bold' if weight == 'bold' else 'normal', size=size)
+
+class Renderer:
+    """
+    Poster renderer holding its theme, fonts and data source as explicit state.
+
+    Unlike the module-level create_poster()/render_poster(), a Renderer reads
+    no globals and draws on its own Figure with an Agg canvas instead of
+    pyplot, so it can be embedded in a long-running process and used from
+    several threads at once.
+
+    Args:
+        theme (dict or str): Theme dict (raw or compiled), or a theme name,
+                             looked up in the shared registry on every render
+        fonts (dict): Font paths from load_fonts(), or None for the monospace
+                      fallback (default: the Roboto fonts loaded at import)
+        fetch (callable): Data source with fetch_map_data()'s signature
+                          (default: fetch_map_data, i.e. OpenStreetMap)
+        figure_pool (FigurePool): Reuse figures between renders instead of
+                                  building new ones (default: None)
+        watch (bool): With a theme name, turn on watch mode for the shared
+                      registry so edits to the theme file show up in later
+                      renders (default: False)
+
+    Usage:
+        renderer = Renderer('noir')
+        renderer.create_poster("Venice", "Italy", (45.438, 12.335), 4000, "venice.png")
+
+        # Or render data you already have
+        renderer.render("Venice", "Italy", (45.438, 12.335), data, "venice.png")
+    """
+
+    def __init__(self, theme, fonts=FONTS, fetch=fetch_map_data, figure_pool=None, watch=False):
+        if theme is None:
+            raise ValueError("Renderer needs a theme dict or theme name")
+        self.theme_name = theme if isinstance(theme, str) else None
+        if self.theme_name is not None:
+            get_theme_registry(watch=watch)
+        # Compiling validates, so a broken theme fails here rather than mid-render
+        self._theme = load_theme(theme) if isinstance(theme, str) else compile_theme(theme)
+        self.fonts = fonts
+        self.fetch = fetch
+        self.figure_pool = figure_pool
+
+    @property
+    def theme(self):
+        """
+        The compiled theme for the next render.
+
+        A theme given by name is looked up in the registry again, so a watched
+        registry's edits take effect; while the file is invalid or missing,
+        the last good version (or load_theme()'s fallback) is kept.
+        """
+        if self.theme_name is not None:
+            try:
+                self._theme = get_theme_registry().get(self.theme_name)
+            except ValueError:
+                pass
+        return self._theme
+
+    def font(self, weight, size):
+        """FontProperties for a weight ('bold', 'regular' or 'light') and size."""
+        return _font_properties(self.fonts[weight] if self.fonts else None, weight, size)
+
+    @contextlib.contextmanager
+    def _canvas(self, figsize, dpi):
+        """Figure and Axes for one render, taken from the figure pool if there is one."""
+        if self.figure_pool is None:
+            yield new_poster_figure(figsize, dpi)
+            return
+        fig, ax = self.figure_pool.acquire(figsize, dpi)
+        try:
+            yield fig, ax
+        finally:
+            self.figure_pool.release(figsize, dpi, fig, ax)
+
+    def figure(self, city, country, point, data, aspect_ratio=(3, 4), dpi=300, base_width=12, enable_gradients=True, verbose=True):
+        """
+        Build the poster Figure (with an Agg canvas) for already-fetched map data.
+
+        Args:
+            city (str): City name
+            country (str): Country name
+            point (tuple): (latitude, longitude) coordinates
+            data (dict): Map data from fetch_map_data(), usually passed through
+                         prepare_map_data(); 'bbox' sets the view
+            aspect_ratio (tuple): (width, height) ratio (default: (3, 4) for poster)
+            dpi (int): Resolution in dots per inch (default: 300)
+            base_width (int): Base width in inches (default: 12)
+            enable_gradients (bool): Whether to apply gradient overlays (default: True)
+            verbose (bool): Print progress messages (default: True)
+
+        Returns:
+            Figure: The poster, not yet drawn (never taken from the figure pool)
+        """
+        figsize = calculate_figure_size(aspect_ratio, base_width)
+        fig, ax = new_poster_figure(figsize, dpi)
+        self._draw(fig, ax, self.theme, city, country, point, data, enable_gradients, verbose)
+        return fig
+
+    def _draw(self, fig, ax, theme, city, country, point, data, enable_gradients=True, verbose=True):
+        """Draw the poster layers and typography onto a prepared Figure and Axes."""
+        bbox = data['bbox']
+        water = data['water']
+        parks = data['parks']
+
+        # 2. Setup Plot with calculated figure size
+        if verbose:
+            width, height = fig.get_size_inches()
+            print("Rendering map...")
+            print(f"Canvas size: {width:.1f}\" × {height:.1f}\" ({width*fig.dpi:.0f}px × {height*fig.dpi:.0f}px)")
+
+        fig.set_facecolor(theme['bg'])
+        ax.set_facecolor(theme['bg'])
+
+        # 3. Plot Layers
+        # Layer 1: Polygons
+        plot_polygons(ax, water, theme['water'], zorder=1)
+        plot_polygons(ax, parks, theme['parks'], zorder=2)
+
+        # Layer 2: Roads with hierarchy coloring
+        if verbose:
+            print("Applying road hierarchy colors...")
+        plot_roads(ax, data['roads'], bbox, theme)
+
+        # Layer 3: Gradients (Top and Bottom) - optional
+        if enable_gradients:
+            create_gradient_fade(ax, theme['gradient_color'], location='bottom', zorder=10)
+            create_gradient_fade(ax, theme['gradient_color'], location='top', zorder=10)
+
+        # 4. Typography with dynamic font sizing
+        # Calculate appropriate font size for city name based on length
+        font_main = self.font('bold', calculate_city_name_font_size(city))
+        font_sub = self.font('light', 22)
+        font_coords = self.font('regular', 14)
+
+        spaced_city = "  ".join(list(city.upper()))
+
+        # --- BOTTOM TEXT ---
+        # Typographic hierarchy with proper leading (line spacing)
+        # Based on standard typographic rhythm: 1.5x leading for body, 2x for display
+        # Text zorder=15 ensures it appears above gradients (zorder=10)
+        #
+        # Vertical rhythm (bottom to top):
+        # - Coordinates: 14pt text at y=0.07
+        # - Country: 22pt text at y=0.10 (spacing: ~0.03 = 2x line height ratio)
+        # - Line: decorative element at y=0.125 (0.025 above country)
+        # - City: 60pt text at y=0.14 (spacing: 0.015 below city baseline)
+        #
+        # This maintains ~1.5-2x leading between elements for proper visual rhythm
+
+        ax.text(0.5, 0.14, spaced_city, transform=ax.transAxes,
+                color=theme['text'], ha='center', fontproperties=font_main, zorder=15)
+
+        ax.plot([0.4, 0.6], [0.125, 0.125], transform=ax.transAxes,
+                color=theme['text'], linewidth=1, zorder=15)
+
+        ax.text(0.5, 0.10, country.upper(), transform=ax.transAxes,
+                color=theme['text'], ha='center', fontproperties=font_sub, zorder=15)
+
+        lat, lon = point
+        coords = f"{lat:.4f}° N / {lon:.4f}° E" if lat >= 0 else f"{abs(lat):.4f}° S / {lon:.4f}° E"
+        if lon < 0:
+            coords = coords.replace("E", "W")
+
+        ax.text(0.5, 0.07, coords, transform=ax.transAxes,
+                color=theme['text'], alpha=0.7, ha='center', fontproperties=font_coords, zorder=15)
+
+        # --- ATTRIBUTION (bottom right) ---
+        ax.text(0.98, 0.02, "© OpenStreetMap contributors", transform=ax.transAxes,
+                color=theme['text'], alpha=0.5, ha='right', va='bottom',
+                fontproperties=self.font('light', 8), zorder=15)
+
+    def render(self, city, country, point, data, output_file, aspect_ratio=(3, 4), dpi=300, base_width=12, enable_gradients=True, verbose=True):
+        """
+        Render already-fetched map data to a poster image.
+
+        Takes the same arguments as figure(), plus output_file: an output
+        file path or a binary file object (PNG).
+        """
+        figsize = calculate_figure_size(aspect_ratio, base_width)
+        theme = self.theme
+        with self._canvas(figsize, dpi) as (fig, ax):
+            self._draw(fig, ax, theme, city, country, point, data, enable_gradients, verbose)
+
+            # 5. Save
+            if verbose:
+                print(f"Saving to {output_file}...")
+            fig.savefig(output_file, dpi=dpi, facecolor=theme['bg'])
+        if verbose:
+            print(f"✓ Done! Poster saved as {output_file}")
+            print(f"Final resolution: {figsize[0]*dpi:.0f}px × {figsize[1]*dpi:.0f}px")
+
+    def rasterize(self, city, country, point, data, aspect_ratio=(3, 4), dpi=300, base_width=12, enable_gradients=True):
+        """
+        Draw a poster into memory without encoding it; see write_png().
+
+        Returns:
+            np.ndarray: (height, width, 4) uint8 RGBA pixels, identical to the
+                        PNG render() would write
+        """
+        figsize = calculate_figure_size(aspect_ratio, base_width)
+        with self._canvas(figsize, dpi) as (fig, ax):
+            self._draw(fig, ax, self.theme, city, country, point, data, enable_gradients, verbose=False)
+            fig.canvas.draw()
+            return np.array(fig.canvas.buffer_rgba())
+
+    def create_poster(self, city, country, point, dist, output_file, aspect_ratio=(3, 4), dpi=300, base_width=12, enable_gradients=True, fill=False, fetch_mode='graph', max_memory=None, max_time=None, count_query=False):
+        """
+        Fetch, prepare and render one poster. Arguments as for create_poster().
+        """
+        print(f"\nGenerating map for {city}, {country}...")
+        print(f"Aspect ratio: {aspect_ratio[0]}:{aspect_ratio[1]}")
+        print(f"Resolution: {dpi} DPI")
+        if fill:
+            print("Fill mode: ON - Extending map to fill entire frame")
+
+        figsize = calculate_figure_size(aspect_ratio, base_width)
+        road_classes = None
+        simplify_roads = False
+        if max_memory is not None or max_time is not None:
+            bbox = calculate_map_bbox(point, dist, aspect_ratio, fill=fill, verbose=False)
+            plan = plan_job(bbox, figsize, dpi, fetch_mode, max_memory=max_memory,
+                            max_time=max_time, count_query=count_query)
+            print_estimate(plan['estimate'])
+            if plan['degraded']:
+                print(f"Budget: degraded to {', '.join(plan['degraded'])}")
+            fetch_mode = plan['fetch_mode']
+            road_classes = plan['road_classes']
+            simplify_roads = plan['simplify']
+
+        data = self.fetch(point, dist, aspect_ratio, fill=fill, fetch_mode=fetch_mode,
+                          road_classes=road_classes)
+        # Only OpenStreetMap downloads say anything about densities for estimates
+        if road_classes is None and self.fetch is fetch_map_data:
+            record_density(data, fetch_mode)
+        data = prepare_map_data(data, figsize, dpi, simplify_roads=simplify_roads)
+        self.render(city, country, point, data, output_file, aspect_ratio=aspect_ratio,
+                    dpi=dpi, base_width=base_width, enable_gradients=enable_gradients)
+
+def render_poster(city, country, point, data, output_file, aspect_ratio=(3, 4), dpi=300, base_width=12, enable_gradients=True, verbose=True):
+    """
+    Render already-fetched map data with the module-level THEME and FONTS.
+
+    See Renderer.render() for the arguments.
+    """
+    Renderer(THEME, FONTS).render(city, country, point, data, output_file, aspect_ratio=aspect_ratio,
+                                  dpi=dpi, base_width=base_width, enable_gradients=enable_gradients,
+                                  verbose=verbose)
+
+def create_poster(city, country, point, dist, output_file, aspect_ratio=(3, 4), dpi=300, base_width=12, enable_gradients=True, fill=False, fetch_mode='graph', max_memory=None, max_time=None, count_query=False):
     """
     Create a map poster with customizable aspect ratio and resolution.
 
+    Uses the module-level THEME and FONTS; see Renderer for a reusable,
+    thread-safe alternative.
+
     Args:
         city (str): City name
         country (str): Country name
@@ -546,159 +2439,421 @@ def create_poster(city, country, point, dist, output_file, aspect_ratio=(3, 4),
         base_width (int): Base width in inches (default: 12)
         enable_gradients (bool): Whether to apply gradient overlays (default: True)
         fill (bool): If True, extends map to completely fill the frame (default: False)
+        fetch_mode (str): 'graph', 'lines' or 'tiled', see fetch_map_data() (default: 'graph')
+        max_memory (float): Peak memory budget in bytes; see plan_job() (default: None)
+        max_time (float): Run time budget in seconds; see plan_job() (default: None)
+        count_query (bool): Estimate from an Overpass count query (default: False)
     """
-    print(f"\nGenerating map for {city}, {country}...")
-    print(f"Aspect ratio: {aspect_ratio[0]}:{aspect_ratio[1]}")
-    print(f"Resolution: {dpi} DPI")
-    if fill:
-        print("Fill mode: ON - Extending map to fill entire frame")
+    Renderer(THEME, FONTS).create_poster(city, country, point, dist, output_file, aspect_ratio=aspect_ratio,
+                                         dpi=dpi, base_width=base_width, enable_gradients=enable_gradients,
+                                         fill=fill, fetch_mode=fetch_mode, max_memory=max_memory,
+                                         max_time=max_time, count_query=count_query)
+
+# --- Zoom sequences ---
+# A sequence fetches the largest extent once and renders every frame from that
+# data by moving the view. Frames are rendered in worker processes that receive
+# the theme, fonts and level-of-detail layers once, via the pool initializer.
+_FRAME_RENDERER = None
+_FRAME_LAYERS = None
+
+def build_level_of_detail(data, pixel_size, levels=4):
+    """
+    Precompute simplified copies of the map layers for zoomed-out frames.
 
-    # Calculate map bounding box based on aspect ratio
-    bbox = calculate_map_bbox(point, dist, aspect_ratio, fill=fill)
+    Args:
+        data (dict): Map data as returned by fetch_map_data()
+        pixel_size (float): Size of one output pixel in degrees at the widest frame
+        levels (int): Number of simplified levels to build (default: 4)
 
-    # Progress bar for data fetching
-    with tqdm(total=3, desc="Fetching map data", unit="step", bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt}') as pbar:
-        # 1. Fetch Street Network using bbox
-        # OSMnx 2.0 API: bbox parameter is (west, south, east, north)
-        # Fill mode parameters ensure we get ALL roads within bbox, including disconnected segments
-        pbar.set_description("Downloading street network")
-        G = ox.graph_from_bbox(
-            bbox=(bbox['west'], bbox['south'], bbox['east'], bbox['north']),
-            network_type='all',
-            truncate_by_edge=fill,  # Extend beyond bbox edges in fill mode
-            retain_all=fill  # Keep disconnected road segments in fill mode
-        )
-        pbar.update(1)
-        time.sleep(0.5)  # Rate limit between requests
+    Returns:
+        list: (tolerance, layers) pairs ordered from coarsest to the original
+              data (tolerance 0). Tolerances halve at each level, starting at
+              half a pixel of the widest frame, so simplification never moves
+              a vertex by more than half a pixel in the frames that use it.
+    """
+    lod = []
+    for level in range(levels):
+        tolerance = pixel_size / 2 / (2 ** level)
+        layers = {}
+        for name in ('roads', 'water', 'parks'):
+            gdf = data[name]
+            if gdf is None or gdf.empty:
+                layers[name] = gdf
+            else:
+                layers[name] = gdf.set_geometry(gdf.geometry.simplify(tolerance))
+        lod.append((tolerance, layers))
+    lod.append((0.0, {name: data[name] for name in ('roads', 'water', 'parks')}))
+    return lod
+
+def _query_extent(gdf, bbox):
+    """Select the rows of a layer that intersect a bbox using its spatial index."""
+    if gdf is None or gdf.empty:
+        return gdf
+    extent = box(bbox['west'], bbox['south'], bbox['east'], bbox['north'])
+    # Sort the hits so features keep their original drawing order
+    return gdf.iloc[np.sort(gdf.sindex.query(extent))]
+
+def _init_frame_worker(theme, fonts, lod):
+    """Pool initializer: set up the frame renderer and index the shared frame data."""
+    global _FRAME_RENDERER, _FRAME_LAYERS
+    _FRAME_RENDERER = Renderer(theme, fonts, figure_pool=FigurePool())
+    _FRAME_LAYERS = lod
+    for _, layers in lod:
+        for gdf in layers.values():
+            if gdf is not None and not gdf.empty:
+                gdf.sindex  # Build the spatial index once per worker
+
+def _render_frame(job):
+    """Render one sequence frame from the worker's shared layers."""
+    city, country, point, bbox, pixel_size, output_file, options = job
+
+    # Coarsest level whose simplification stays under half a pixel of this frame
+    for tolerance, layers in _FRAME_LAYERS:
+        if tolerance <= pixel_size / 2:
+            break
+
+    data = {name: _query_extent(gdf, bbox) for name, gdf in layers.items()}
+    data['bbox'] = bbox
+    _FRAME_RENDERER.render(city, country, point, data, output_file, verbose=False, **options)
+    return output_file
+
+GIF_MAX_WIDTH = 720  # pixels; GIF frames are downscaled to at most this width
+
+def write_animation(frame_files, output_file, fps=12, max_width=GIF_MAX_WIDTH):
+    """
+    Combine rendered frames into a looping animated GIF.
 
-        # 2. Fetch Water Features using bbox
-        pbar.set_description("Downloading water features")
-        try:
-            water = ox.features_from_bbox(
-                bbox=(bbox['west'], bbox['south'], bbox['east'], bbox['north']),
-                tags={'natural': 'water', 'waterway': 'riverbank'}
-            )
-        except:
-            water = None
-        pbar.update(1)
-        time.sleep(0.3)
-
-        # 3. Fetch Parks using bbox
-        pbar.set_description("Downloading parks/green spaces")
-        try:
-            parks = ox.features_from_bbox(
-                bbox=(bbox['west'], bbox['south'], bbox['east'], bbox['north']),
-                tags={'leisure': 'park', 'landuse': 'grass'}
-            )
-        except:
-            parks = None
-        pbar.update(1)
-    
-    print("✓ All data downloaded successfully!")
+    Frames are loaded one at a time, downscaled and reduced to a palette
+    before the GIF writer sees them, so memory stays small per frame instead
+    of holding every full-resolution RGBA frame (~69 MB each at 300 DPI).
 
-    # 2. Setup Plot with calculated figure size
-    print("Rendering map...")
-    figsize = calculate_figure_size(aspect_ratio, base_width)
-    print(f"Canvas size: {figsize[0]:.1f}\" × {figsize[1]:.1f}\" ({figsize[0]*dpi:.0f}px × {figsize[1]*dpi:.0f}px)")
+    Args:
+        frame_files (list): Frame image paths, in playback order
+        output_file (str): Output .gif path
+        fps (int): Frames per second (default: 12)
+        max_width (int): Maximum GIF width in pixels (default: GIF_MAX_WIDTH)
+    """
+    from PIL import Image
 
-    fig, ax = plt.subplots(figsize=figsize, facecolor=THEME['bg'])
-    ax.set_facecolor(THEME['bg'])
-    ax.set_position([0, 0, 1, 1])
-    
-    # 3. Plot Layers
-    # Layer 1: Polygons
-    if water is not None and not water.empty:
-        water.plot(ax=ax, facecolor=THEME['water'], edgecolor='none', zorder=1)
-    if parks is not None and not parks.empty:
-        parks.plot(ax=ax, facecolor=THEME['parks'], edgecolor='none', zorder=2)
-    
-    # Layer 2: Roads with hierarchy coloring
-    print("Applying road hierarchy colors...")
-    edge_colors = get_edge_colors_by_type(G)
-    edge_widths = get_edge_widths_by_type(G)
-    
-    ox.plot_graph(
-        G, ax=ax, bgcolor=THEME['bg'],
-        node_size=0,
-        edge_color=edge_colors,
-        edge_linewidth=edge_widths,
-        show=False, close=False
-    )
+    def load(path):
+        with Image.open(path) as frame:
+            frame = frame.convert('RGB')
+        if frame.width > max_width:
+            frame = frame.resize((max_width, round(frame.height * max_width / frame.width)),
+                                 Image.Resampling.LANCZOS)
+        return frame.convert('P', palette=Image.Palette.ADAPTIVE)
 
-    # Lock axis limits to bbox to ensure consistent scale
-    # This prevents auto-scaling when truncate_by_edge adds roads beyond bbox
-    ax.set_xlim(bbox['west'], bbox['east'])
-    ax.set_ylim(bbox['south'], bbox['north'])
+    first = load(frame_files[0])
+    first.save(output_file, save_all=True, append_images=(load(path) for path in frame_files[1:]),
+               duration=int(1000 / fps), loop=0)
 
-    # Layer 3: Gradients (Top and Bottom) - optional
-    if enable_gradients:
-        create_gradient_fade(ax, THEME['gradient_color'], location='bottom', zorder=10)
-        create_gradient_fade(ax, THEME['gradient_color'], location='top', zorder=10)
+def create_poster_sequence(city, country, point, start_dist, end_dist, frames, output_dir, aspect_ratio=(3, 4), dpi=300, base_width=12, enable_gradients=True, fill=False, workers=None, gif=False, fps=12, fetch_mode='graph'):
+    """
+    Render a zoom sequence between two distances from a single data fetch.
 
-    # 4. Typography with dynamic font sizing
-    # Calculate appropriate font size for city name based on length
-    city_font_size = calculate_city_name_font_size(city)
+    The largest extent is downloaded once; each frame only changes the view
+    limits and level of detail. Distances are spaced geometrically so the zoom
+    speed looks constant.
 
-    if FONTS:
-        font_main = FontProperties(fname=FONTS['bold'], size=city_font_size)
-        font_top = FontProperties(fname=FONTS['bold'], size=40)
-        font_sub = FontProperties(fname=FONTS['light'], size=22)
-        font_coords = FontProperties(fname=FONTS['regular'], size=14)
-    else:
-        # Fallback to system fonts
-        font_main = FontProperties(family='monospace', weight='bold', size=city_font_size)
-        font_top = FontProperties(family='monospace', weight='bold', size=40)
-        font_sub = FontProperties(family='monospace', weight='normal', size=22)
-        font_coords = FontProperties(family='monospace', size=14)
-
-    spaced_city = "  ".join(list(city.upper()))
-
-    # --- BOTTOM TEXT ---
-    # Typographic hierarchy with proper leading (line spacing)
-    # Based on standard typographic rhythm: 1.5x leading for body, 2x for display
-    # Text zorder=15 ensures it appears above gradients (zorder=10)
-    #
-    # Vertical rhythm (bottom to top):
-    # - Coordinates: 14pt text at y=0.07
-    # - Country: 22pt text at y=0.10 (spacing: ~0.03 = 2x line height ratio)
-    # - Line: decorative element at y=0.125 (0.025 above country)
-    # - City: 60pt text at y=0.14 (spacing: 0.015 below city baseline)
-    #
-    # This maintains ~1.5-2x leading between elements for proper visual rhythm
-
-    ax.text(0.5, 0.14, spaced_city, transform=ax.transAxes,
-            color=THEME['text'], ha='center', fontproperties=font_main, zorder=15)
-
-    ax.plot([0.4, 0.6], [0.125, 0.125], transform=ax.transAxes,
-            color=THEME['text'], linewidth=1, zorder=15)
-
-    ax.text(0.5, 0.10, country.upper(), transform=ax.transAxes,
-            color=THEME['text'], ha='center', fontproperties=font_sub, zorder=15)
+    Args:
+        city (str): City name
+        country (str): Country name
+        point (tuple): (latitude, longitude) coordinates
+        start_dist (int): Distance in meters of the first frame
+        end_dist (int): Distance in meters of the last frame
+        frames (int): Number of frames to render
+        output_dir (str): Directory that receives frame_0001.png, ...
+        aspect_ratio (tuple): (width, height) ratio (default: (3, 4) for poster)
+        dpi (int): Resolution in dots per inch (default: 300)
+        base_width (int): Base width in inches (default: 12)
+        enable_gradients (bool): Whether to apply gradient overlays (default: True)
+        fill (bool): If True, extends map to completely fill the frame (default: False)
+        workers (int): Render processes (default: one per CPU)
+        gif (bool): Also write an animated GIF of the frames (default: False)
+        fps (int): GIF frames per second (default: 12)
+        fetch_mode (str): 'graph', 'lines' or 'tiled', see fetch_map_data() (default: 'graph')
 
-    lat, lon = point
-    coords = f"{lat:.4f}° N / {lon:.4f}° E" if lat >= 0 else f"{abs(lat):.4f}° S / {lon:.4f}° E"
-    if lon < 0:
-        coords = coords.replace("E", "W")
+    Returns:
+        list: Paths of the rendered frames
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
 
-    ax.text(0.5, 0.07, coords, transform=ax.transAxes,
-            color=THEME['text'], alpha=0.7, ha='center', fontproperties=font_coords, zorder=15)
+    print(f"\nGenerating zoom sequence for {city}, {country}...")
+    print(f"Distance: {start_dist}m → {end_dist}m over {frames} frames")
 
-    # --- ATTRIBUTION (bottom right) ---
-    if FONTS:
-        font_attr = FontProperties(fname=FONTS['light'], size=8)
-    else:
-        font_attr = FontProperties(family='monospace', size=8)
+    distances = np.geomspace(start_dist, end_dist, frames)
+    data = fetch_map_data(point, max(start_dist, end_dist), aspect_ratio, fill=fill, fetch_mode=fetch_mode)
+
+    figsize = calculate_figure_size(aspect_ratio, base_width)
+    width_px = figsize[0] * dpi
+    widest = data['bbox']
+
+    # Preprocess polygons once, at the resolution of the most zoomed-in frame
+    nearest = calculate_map_bbox(point, min(start_dist, end_dist), aspect_ratio, fill=fill, verbose=False)
+    prepared = prepare_map_data(dict(data, bbox=nearest), figsize, dpi)
+    data = dict(prepared, bbox=widest)
+    lod = build_level_of_detail(data, (widest['east'] - widest['west']) / width_px)
+
+    os.makedirs(output_dir, exist_ok=True)
+    options = {'aspect_ratio': aspect_ratio, 'dpi': dpi, 'base_width': base_width,
+               'enable_gradients': enable_gradients}
+    jobs = []
+    for i, dist in enumerate(distances):
+        bbox = calculate_map_bbox(point, dist, aspect_ratio, fill=fill, verbose=False)
+        pixel_size = (bbox['east'] - bbox['west']) / width_px
+        output_file = os.path.join(output_dir, f"frame_{i + 1:04d}.png")
+        jobs.append((city, country, point, bbox, pixel_size, output_file, options))
+
+    # Spawned, not forked: the HTTP pool and progress bar threads are alive here
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_frame_worker, initargs=(THEME, FONTS, lod)) as pool:
+        frame_files = list(tqdm(pool.map(_render_frame, jobs), total=len(jobs),
+                                desc="Rendering frames", unit="frame"))
+
+    print(f"✓ Done! {len(frame_files)} frames saved in {output_dir}")
+
+    if gif:
+        gif_file = os.path.join(output_dir, "animation.gif")
+        write_animation(frame_files, gif_file, fps=fps)
+        print(f"✓ Animation saved as {gif_file}")
+
+    return frame_files
+
+# --- Batch pipeline ---
+# Many posters are rendered as a three-stage pipeline so that network-bound and
+# CPU-bound work overlap: fetch threads geocode and download, a process pool
+# preprocesses and rasterizes, and encode threads write PNGs (PIL releases the
+# GIL while compressing). Bounded queues between the stages apply
+# backpressure, so the next city downloads while the current one renders but
+# fetched data never piles up in memory.
+BATCH_FETCH_WORKERS = 2
+BATCH_ENCODE_WORKERS = 2
+BATCH_QUEUE_SIZE = 2  # jobs waiting between two stages
+
+class StageStats:
+    """Busy and blocked time of one pipeline stage, for the utilization report."""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.jobs = 0
+        self.failed = 0
+        self.busy = 0.0     # seconds spent working on jobs
+        self.blocked = 0.0  # seconds waiting for room in the next stage's queue
+        self._lock = threading.Lock()
+
+    def add(self, busy=0.0, blocked=0.0, failed=False):
+        with self._lock:
+            self.jobs += 1
+            self.failed += failed
+            self.busy += busy
+            self.blocked += blocked
+
+    def utilization(self, wall_time):
+        """Fraction of the stage's worker time spent busy."""
+        return self.busy / (wall_time * self.workers) if wall_time > 0 else 0.0
+
+def read_batch_file(path):
+    """
+    Read a batch of posters from a CSV file.
+
+    The header names the columns: 'city' and 'country' are required, 'theme'
+    and 'distance' are optional per row.
+
+    Returns:
+        list: One dict per poster, with None for missing optional values
+
+    Raises:
+        ValueError: If the file lacks required columns or values
+    """
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        columns = [name.strip().lower() for name in reader.fieldnames or []]
+        missing = {'city', 'country'} - set(columns)
+        if missing:
+            raise ValueError(f"Batch file {path} is missing column(s): {', '.join(sorted(missing))}")
+        reader.fieldnames = columns
+
+        jobs = []
+        for line, row in enumerate(reader, start=2):
+            row = {key: (value or '').strip() for key, value in row.items() if key}
+            if not row['city'] or not row['country']:
+                raise ValueError(f"{path}:{line}: city and country are required")
+            jobs.append({
+                'city': row['city'],
+                'country': row['country'],
+                'theme': row.get('theme') or None,
+                'distance': int(row['distance']) if row.get('distance') else None,
+            })
+    return jobs
+
+def write_png(rgba, output_file, dpi=300):
+    """Encode RGBA pixels from Renderer.rasterize() as a PNG, as Figure.savefig() would."""
+    from PIL import Image
+
+    Image.fromarray(rgba, 'RGBA').save(output_file, format='png', dpi=(dpi, dpi))
+
+_WORKER_FIGURE_POOL = None
+
+def _rasterize_batch_job(job):
+    """Render stage, run in a worker process: preprocess and rasterize one poster."""
+    global _WORKER_FIGURE_POOL
+    city, country, point, data, simplify_roads, theme, fonts, options = job
+    if _WORKER_FIGURE_POOL is None:
+        _WORKER_FIGURE_POOL = FigurePool()
+    figsize = calculate_figure_size(options['aspect_ratio'], options['base_width'])
+    data = prepare_map_data(data, figsize, options['dpi'], simplify_roads=simplify_roads)
+    renderer = Renderer(theme, fonts, figure_pool=_WORKER_FIGURE_POOL)
+    return renderer.rasterize(city, country, point, data, **options)
+
+def run_batch(jobs, theme='feature_based', distance=29000, aspect_ratio=(3, 4), dpi=300, base_width=12, enable_gradients=True, fill=False, fetch_mode='graph', max_memory=None, max_time=None, count_query=False, gazetteer=None, fetch_workers=BATCH_FETCH_WORKERS, render_workers=None, encode_workers=BATCH_ENCODE_WORKERS, queue_size=BATCH_QUEUE_SIZE):
+    """
+    Render many posters with downloads, rendering and encoding overlapped.
 
-    ax.text(0.98, 0.02, "© OpenStreetMap contributors", transform=ax.transAxes,
-            color=THEME['text'], alpha=0.5, ha='right', va='bottom',
-            fontproperties=font_attr, zorder=15)
+    Args:
+        jobs (list): Dicts with 'city' and 'country', and optionally 'theme'
+                     and 'distance' (see read_batch_file())
+        theme (str): Theme for jobs without one (default: 'feature_based')
+        distance (int): Distance in meters for jobs without one (default: 29000)
+        fetch_workers (int): Threads geocoding and downloading (default: 2)
+        render_workers (int): Processes rasterizing posters (default: one per CPU)
+        encode_workers (int): Threads encoding and writing PNGs (default: 2)
+        queue_size (int): Jobs buffered between stages (default: 2)
+        aspect_ratio, dpi, base_width, enable_gradients, fill, fetch_mode,
+        max_memory, max_time, count_query:
+                     as for create_poster(); budgets are planned per job, and a
+                     job that can't fit them fails in the fetch stage
+        gazetteer (str): As for get_coordinates()
 
-    # 5. Save
-    print(f"Saving to {output_file}...")
-    plt.savefig(output_file, dpi=dpi, facecolor=THEME['bg'])
-    plt.close()
-    print(f"✓ Done! Poster saved as {output_file}")
-    print(f"Final resolution: {figsize[0]*dpi:.0f}px × {figsize[1]*dpi:.0f}px")
+    Returns:
+        list: Output file per job, in job order (None where the job failed)
+    """
+    import multiprocessing
+    import queue
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    render_workers = render_workers or os.cpu_count() or 1
+    number_width = len(str(len(jobs)))
+    themes = {}
+    for name in {job.get('theme') or theme for job in jobs}:
+        themes[name] = load_theme(name)
+    options = {'aspect_ratio': aspect_ratio, 'dpi': dpi, 'base_width': base_width,
+               'enable_gradients': enable_gradients}
+    figsize = calculate_figure_size(aspect_ratio, base_width)
+
+    pending = queue.Queue()
+    for index, job in enumerate(jobs):
+        pending.put((index, job))
+    to_render = queue.Queue(maxsize=queue_size)
+    to_encode = queue.Queue(maxsize=queue_size)
+    done = object()  # end-of-stream marker
+    outputs = [None] * len(jobs)
+    stats = {
+        'fetch': StageStats('fetch', fetch_workers),
+        'render': StageStats('render', render_workers),
+        'encode': StageStats('encode', encode_workers),
+    }
+
+    def hand_over(stage, target, item, started):
+        """Queue an item for the next stage, accounting busy and blocked time."""
+        busy = time.perf_counter() - started
+        target.put(item)
+        stats[stage].add(busy=busy, blocked=time.perf_counter() - started - busy)
+
+    def fetch_loop():
+        while True:
+            try:
+                index, job = pending.get_nowait()
+            except queue.Empty:
+                return
+            started = time.perf_counter()
+            try:
+                point = get_coordinates(job['city'], job['country'], gazetteer=gazetteer)
+                job_distance = job.get('distance') or distance
+                plan = {'fetch_mode': fetch_mode, 'road_classes': None, 'simplify': False}
+                if max_memory is not None or max_time is not None:
+                    bbox = calculate_map_bbox(point, job_distance, aspect_ratio, fill=fill, verbose=False)
+                    plan = plan_job(bbox, figsize, dpi, fetch_mode, max_memory=max_memory,
+                                    max_time=max_time, count_query=count_query)
+                    if plan['degraded']:
+                        print(f"  {job['city']}: budget: degraded to {', '.join(plan['degraded'])}")
+                data = fetch_map_data(point, job_distance, aspect_ratio, fill=fill,
+                                      fetch_mode=plan['fetch_mode'], road_classes=plan['road_classes'])
+                if plan['road_classes'] is None:
+                    record_density(data, plan['fetch_mode'])
+            except Exception as e:
+                print(f"⚠ {job['city']}: fetch failed: {e}")
+                stats['fetch'].add(busy=time.perf_counter() - started, failed=True)
+                continue
+            hand_over('fetch', to_render, (index, job, point, data, plan['simplify']), started)
+
+    def render_loop(pool):
+        # Each loop keeps one job in flight in the process pool
+        while True:
+            item = to_render.get()
+            if item is done:
+                return
+            index, job, point, data, simplify_roads = item
+            started = time.perf_counter()
+            try:
+                rgba = pool.submit(_rasterize_batch_job, (
+                    job['city'], job['country'], point, data, simplify_roads,
+                    themes[job.get('theme') or theme], FONTS, options)).result()
+            except Exception as e:
+                print(f"⚠ {job['city']}: render failed: {e}")
+                stats['render'].add(busy=time.perf_counter() - started, failed=True)
+                continue
+            hand_over('render', to_encode, (index, job, rgba), started)
+
+    def encode_loop():
+        while True:
+            item = to_encode.get()
+            if item is done:
+                return
+            index, job, rgba = item
+            started = time.perf_counter()
+            try:
+                # Jobs with the same city and theme can finish within the same second
+                output_file = generate_output_filename(job['city'], job.get('theme') or theme,
+                                                       suffix=f"{index + 1:0{number_width}d}")
+                write_png(rgba, output_file, dpi)
+                outputs[index] = output_file
+                print(f"✓ [{sum(1 for o in outputs if o)}/{len(jobs)}] {job['city']} saved as {output_file}")
+            except Exception as e:
+                print(f"⚠ {job['city']}: write failed: {e}")
+            stats['encode'].add(busy=time.perf_counter() - started, failed=outputs[index] is None)
+
+    print(f"Rendering {len(jobs)} posters ({fetch_workers} fetch threads, "
+          f"{render_workers} render processes, {encode_workers} encode threads)...")
+    started = time.perf_counter()
+    # Spawned, not forked: worker processes start while the stage threads run
+    with ProcessPoolExecutor(max_workers=render_workers, mp_context=multiprocessing.get_context('spawn')) as pool, \
+            ThreadPoolExecutor(max_workers=fetch_workers + render_workers + encode_workers) as threads:
+        fetchers = [threads.submit(fetch_loop) for _ in range(fetch_workers)]
+        renderers = [threads.submit(render_loop, pool) for _ in range(render_workers)]
+        encoders = [threads.submit(encode_loop) for _ in range(encode_workers)]
+        # Shut the stages down in order once everything upstream has drained
+        for stage, target, consumers in ((fetchers, to_render, renderers), (renderers, to_encode, encoders)):
+            for future in stage:
+                future.result()
+            for _ in consumers:
+                target.put(done)
+        for future in encoders:
+            future.result()
+    wall_time = time.perf_counter() - started
+
+    print_batch_report(stats.values(), wall_time)
+    return outputs
+
+def print_batch_report(stats, wall_time):
+    """Print per-stage job counts and utilization for a batch run."""
+    print(f"\nPipeline utilization over {wall_time:.1f}s:")
+    print(f"  {'stage':<8}{'workers':>8}{'jobs':>6}{'failed':>8}{'busy':>8}{'blocked':>9}")
+    for stage in stats:
+        blocked = stage.blocked / (wall_time * stage.workers) if wall_time > 0 else 0.0
+        print(f"  {stage.name:<8}{stage.workers:>8}{stage.jobs:>6}{stage.failed:>8}"
+              f"{stage.utilization(wall_time):>8.0%}{blocked:>9.0%}")
 
 def print_examples():
     """Print usage examples."""
@@ -737,6 +2892,12 @@ Examples:
   python create_map_poster.py -c "London" -C "UK" -t noir -d 15000              # Thames curves
   python create_map_poster.py -c "Budapest" -C "Hungary" -t copper_patina -d 8000  # Danube split
   
+  # Zoom animation (one download, frames rendered in parallel)
+  python create_map_poster.py -c "Paris" -C "France" -t noir --sequence 2000 15000 48 --gif
+
+  # Many posters at once (downloads overlap with rendering)
+  python create_map_poster.py --batch cities.csv -t noir
+
   # List themes
   python create_map_poster.py --list-themes
 
@@ -745,6 +2906,8 @@ Options:
   --country, -C     Country name (required)
   --theme, -t       Theme name (default: feature_based)
   --distance, -d    Map radius in meters (default: 29000)
+  --sequence        START END FRAMES: render a zoom sequence from one data fetch
+  --batch           FILE: render every city listed in a CSV file, pipelined
   --list-themes     List all available themes
 
 Distance guide:
@@ -758,28 +2921,23 @@ Generated posters are saved to 'posters/' directory.
 
 def list_themes():
     """List all available themes with descriptions."""
-    available_themes = get_available_themes()
-    if not available_themes:
+    registry = get_theme_registry()
+    available_themes = registry.names()
+    if not available_themes and not registry.errors:
         print("No themes found in 'themes/' directory.")
         return
 
     print("\nAvailable Themes:")
     print("-" * 60)
     for theme_name in available_themes:
-        theme_path = os.path.join(THEMES_DIR, f"{theme_name}.json")
-        try:
-            with open(theme_path, 'r') as f:
-                theme_data = json.load(f)
-                display_name = theme_data.get('name', theme_name)
-                description = theme_data.get('description', '')
-        except:
-            display_name = theme_name
-            description = ''
+        theme = registry.get(theme_name)
         print(f"  {theme_name}")
-        print(f"    {display_name}")
-        if description:
-            print(f"    {description}")
+        print(f"    {theme.get('name', theme_name)}")
+        if theme.get('description'):
+            print(f"    {theme['description']}")
         print()
+    for theme_name, error in sorted(registry.errors.items()):
+        print(f"  ⚠ {theme_name} (invalid): {error}")
 
 
 def list_aspect_ratios():
@@ -824,6 +2982,35 @@ Examples:
                        help='Disable gradient overlays at top and bottom')
     parser.add_argument('--fill', action='store_true',
                        help='Extend map to completely fill the frame, even beyond distance setting')
+    parser.add_argument('--fetch-mode', type=str, choices=FETCH_MODES, default='graph',
+                       help="Data download: 'graph' (OSMnx street graph), 'lines' (geometry only, faster) "
+                            "or 'tiled' (lines fetched as parallel, cached tiles for large areas) (default: graph)")
+    parser.add_argument('--estimate', action='store_true',
+                       help='Print the predicted download size, memory and time, then exit')
+    parser.add_argument('--count-query', action='store_true',
+                       help='Base estimates on a cheap Overpass count query instead of cached densities')
+    parser.add_argument('--max-memory', type=int, default=None,
+                       help='Peak memory budget in MB; lowers detail or rejects the job before fetching')
+    parser.add_argument('--max-time', type=int, default=None,
+                       help='Run time budget in seconds; lowers detail or rejects the job before fetching')
+    parser.add_argument('--sequence', type=int, nargs=3, metavar=('START', 'END', 'FRAMES'),
+                       help='Render a zoom sequence from START to END meters over FRAMES frames')
+    parser.add_argument('--gif', action='store_true',
+                       help='With --sequence, also write an animated GIF of the frames')
+    parser.add_argument('--fps', type=int, default=12,
+                       help='Frames per second for --gif (default: 12)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Processes used to render sequence frames or batch posters (default: one per CPU)')
+    parser.add_argument('--batch', type=str, default=None, metavar='FILE',
+                       help='Render every poster listed in a CSV file (columns: city, country[, theme, distance])')
+    parser.add_argument('--fetch-workers', type=int, default=BATCH_FETCH_WORKERS,
+                       help=f'With --batch, threads downloading map data (default: {BATCH_FETCH_WORKERS})')
+    parser.add_argument('--gazetteer', type=str, default=None,
+                       help='Geocode offline from a GeoNames cities dump (e.g. cities15000.txt) instead of Nominatim')
+    parser.add_argument('--overpass-url', type=str, default=None,
+                       help='Overpass API base URL (default: $MAPTOPOSTER_OVERPASS_URL or overpass-api.de)')
+    parser.add_argument('--nominatim-url', type=str, default=None,
+                       help='Nominatim base URL (default: $MAPTOPOSTER_NOMINATIM_URL or nominatim.openstreetmap.org)')
     parser.add_argument('--list-themes', action='store_true', help='List all available themes')
     parser.add_argument('--list-ratios', action='store_true', help='List all available aspect ratio presets')
     
@@ -844,17 +3031,41 @@ Examples:
         list_aspect_ratios()
         os.sys.exit(0)
 
+    # Read the batch file, if any
+    batch = None
+    if args.batch:
+        try:
+            batch = read_batch_file(args.batch)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            os.sys.exit(1)
+
     # Validate required arguments
-    if not args.city or not args.country:
+    if batch is None and (not args.city or not args.country):
         print("Error: --city and --country are required.\n")
         print_examples()
         os.sys.exit(1)
 
     # Validate theme exists
     available_themes = get_available_themes()
-    if args.theme not in available_themes:
-        print(f"Error: Theme '{args.theme}' not found.")
-        print(f"Available themes: {', '.join(available_themes)}")
+    requested_themes = {args.theme} | {job['theme'] for job in batch or [] if job['theme']}
+    for theme_name in sorted(requested_themes):
+        if theme_name in get_theme_registry().errors:
+            print(f"Error: {get_theme_registry().errors[theme_name]}")
+            os.sys.exit(1)
+        if theme_name not in available_themes:
+            print(f"Error: Theme '{theme_name}' not found.")
+            print(f"Available themes: {', '.join(available_themes)}")
+            os.sys.exit(1)
+
+    # Estimates and zoom sequences are single-poster modes
+    if batch is not None and (args.estimate or args.sequence):
+        print(f"Error: {'--estimate' if args.estimate else '--sequence'} can't be combined with --batch.")
+        os.sys.exit(1)
+
+    # Validate zoom sequence
+    if args.sequence and (min(args.sequence) < 1):
+        print("Error: --sequence START, END and FRAMES must all be positive.")
         os.sys.exit(1)
 
     # Parse aspect ratio
@@ -868,16 +3079,50 @@ Examples:
     print("City Map Poster Generator")
     print("=" * 50)
 
+    configure_endpoints(overpass_url=args.overpass_url, nominatim_url=args.nominatim_url)
+
+    if batch is not None:
+        outputs = run_batch(batch, theme=args.theme, distance=args.distance, aspect_ratio=aspect_ratio,
+                            dpi=args.dpi, base_width=args.width, enable_gradients=not args.no_gradient,
+                            fill=args.fill, fetch_mode=args.fetch_mode,
+                            max_memory=args.max_memory * 1e6 if args.max_memory else None,
+                            max_time=args.max_time, count_query=args.count_query,
+                            gazetteer=args.gazetteer, fetch_workers=args.fetch_workers,
+                            render_workers=args.workers)
+        failed = sum(1 for output in outputs if output is None)
+        print("\n" + "=" * 50)
+        print(f"✓ Batch complete: {len(outputs) - failed} posters" + (f", {failed} failed" if failed else ""))
+        print("=" * 50)
+        os.sys.exit(1 if failed else 0)
+
     # Load theme
     THEME = load_theme(args.theme)
 
     # Get coordinates and generate poster
     try:
-        coords = get_coordinates(args.city, args.country)
-        output_file = generate_output_filename(args.city, args.theme)
-        create_poster(args.city, args.country, coords, args.distance, output_file,
-                     aspect_ratio=aspect_ratio, dpi=args.dpi, base_width=args.width,
-                     enable_gradients=not args.no_gradient, fill=args.fill)
+        coords = get_coordinates(args.city, args.country, gazetteer=args.gazetteer)
+        if args.sequence:
+            start_dist, end_dist, frames = args.sequence
+            output_dir = generate_sequence_dirname(args.city, args.theme)
+            create_poster_sequence(args.city, args.country, coords, start_dist, end_dist, frames,
+                                   output_dir, aspect_ratio=aspect_ratio, dpi=args.dpi,
+                                   base_width=args.width, enable_gradients=not args.no_gradient,
+                                   fill=args.fill, workers=args.workers, gif=args.gif, fps=args.fps,
+                                   fetch_mode=args.fetch_mode)
+        elif args.estimate:
+            bbox = calculate_map_bbox(coords, args.distance, aspect_ratio, fill=args.fill)
+            figsize = calculate_figure_size(aspect_ratio, args.width)
+            counts = count_map_features(bbox) if args.count_query else None
+            print_estimate(estimate_job_cost(bbox, figsize, args.dpi, args.fetch_mode, counts=counts))
+            os.sys.exit(0)
+        else:
+            output_file = generate_output_filename(args.city, args.theme)
+            create_poster(args.city, args.country, coords, args.distance, output_file,
+                         aspect_ratio=aspect_ratio, dpi=args.dpi, base_width=args.width,
+                         enable_gradients=not args.no_gradient, fill=args.fill,
+                         fetch_mode=args.fetch_mode,
+                         max_memory=args.max_memory * 1e6 if args.max_memory else None,
+                         max_time=args.max_time, count_query=args.count_query)
         
         print("\n" + "=" * 50)
         print("✓ Poster generation complete!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch rendering pipeline.
+Geocoding and downloads are stubbed with a small synthetic dataset, so the
+pipeline runs offline through its real render processes and encode threads.
+
+Usage:
+    python -m pytest test_batch.py
+"""
+
+import os
+import subprocess
+import sys
+
+import geopandas as gpd
+from shapely.geometry import LineString, box
+
+import create_map_poster as poster
+
+POINT = (45.438, 12.335)
+
+
+def fake_coordinates(city, country, gazetteer=None):
+    return POINT
+
+
+def fake_fetch(point, dist, aspect_ratio=(3, 4), fill=False, fetch_mode='graph', road_classes=None):
+    lat, lon = point
+    roads = gpd.GeoDataFrame({'highway': ['primary', 'residential']}, crs='EPSG:4326', geometry=[
+        LineString([(lon - 0.01, lat), (lon + 0.01, lat)]),
+        LineString([(lon, lat - 0.01), (lon, lat + 0.01)]),
+    ])
+    water = gpd.GeoDataFrame(geometry=[box(lon - 0.01, lat - 0.01, lon, lat - 0.005)], crs='EPSG:4326')
+    return {'bbox': poster.calculate_map_bbox(point, dist, aspect_ratio, verbose=False),
+            'roads': roads, 'water': water, 'parks': None}
+
+
+def run(monkeypatch, tmp_path, jobs):
+    monkeypatch.setattr(poster, 'POSTERS_DIR', str(tmp_path / "posters"))
+    monkeypatch.setattr(poster, 'DENSITY_FILE', str(tmp_path / "density.json"))
+    monkeypatch.setattr(poster, 'get_coordinates', fake_coordinates)
+    monkeypatch.setattr(poster, 'fetch_map_data', fake_fetch)
+    return poster.run_batch(jobs, theme='noir', distance=1500, dpi=20, render_workers=1)
+
+
+def test_same_city_and_theme(monkeypatch, tmp_path):
+    """Jobs with the same city and theme are written to separate files."""
+    jobs = [{'city': 'Venice', 'country': 'Italy'}] * 3 + [{'city': 'Venice', 'country': 'Italy', 'distance': 900}]
+    outputs = run(monkeypatch, tmp_path, jobs)
+
+    assert all(outputs)
+    assert len(set(outputs)) == len(jobs)
+    assert all(os.path.exists(output) for output in outputs)
+
+
+def test_write_failure_skips_job(monkeypatch, tmp_path):
+    """A failed write only loses that job; the encode threads keep going."""
+    write_png = poster.write_png
+
+    def flaky_write_png(rgba, output_file, dpi=300):
+        if output_file.endswith('_2.png'):
+            raise OSError("disk full")
+        write_png(rgba, output_file, dpi)
+
+    monkeypatch.setattr(poster, 'write_png', flaky_write_png)
+    jobs = [{'city': city, 'country': 'Italy'} for city in ('Venice', 'Rome', 'Milan')]
+    outputs = run(monkeypatch, tmp_path, jobs)
+
+    assert outputs[1] is None
+    assert os.path.exists(outputs[0]) and os.path.exists(outputs[2])
+
+
+def test_budgets_planned_per_job(monkeypatch, tmp_path):
+    """Budgets are planned for each job; one that can't fit fails without stopping the batch."""
+    fetches = []
+
+    def fake_plan(bbox, figsize, dpi, fetch_mode='graph', max_memory=None, max_time=None, count_query=False):
+        if bbox['north'] - bbox['south'] > 0.05:
+            raise ValueError("Job exceeds the budget")
+        return {'fetch_mode': 'lines', 'road_classes': ['motorway', 'primary'], 'simplify': True,
+                'estimate': {}, 'degraded': ['lines fetch mode']}
+
+    def recording_fetch(point, dist, aspect_ratio=(3, 4), fill=False, fetch_mode='graph', road_classes=None):
+        fetches.append((fetch_mode, road_classes))
+        return fake_fetch(point, dist, aspect_ratio, fill, fetch_mode, road_classes)
+
+    monkeypatch.setattr(poster, 'POSTERS_DIR', str(tmp_path / "posters"))
+    monkeypatch.setattr(poster, 'get_coordinates', fake_coordinates)
+    monkeypatch.setattr(poster, 'fetch_map_data', recording_fetch)
+    monkeypatch.setattr(poster, 'plan_job', fake_plan)
+    jobs = [{'city': 'Venice', 'country': 'Italy'}, {'city': 'Rome', 'country': 'Italy', 'distance': 9000}]
+    outputs = poster.run_batch(jobs, theme='noir', distance=1500, dpi=20, render_workers=1, max_time=60)
+
+    assert fetches == [('lines', ['motorway', 'primary'])]
+    assert os.path.exists(outputs[0]) and outputs[1] is None
+
+
+def test_batch_rejects_single_poster_modes(tmp_path):
+    """--estimate and --sequence are refused with --batch instead of being ignored."""
+    batch_file = tmp_path / "cities.csv"
+    batch_file.write_text("city,country\nVenice,Italy\n")
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "create_map_poster.py")
+    for flags in (['--estimate'], ['--sequence', '4000', '1000', '4']):
+        result = subprocess.run([sys.executable, script, '--batch', str(batch_file), *flags],
+                                capture_output=True, text=True)
+        assert result.returncode == 1
+        assert f"{flags[0]} can't be combined with --batch" in result.stdout
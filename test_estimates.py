@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for job cost estimates and budget planning.
+Uses the built-in prior densities, so nothing touches the network.
+
+Usage:
+    python -m pytest test_estimates.py
+"""
+
+import pytest
+
+import create_map_poster as poster
+
+FIGSIZE = poster.calculate_figure_size((3, 4))
+
+
+@pytest.fixture(autouse=True)
+def prior_densities(tmp_path, monkeypatch):
+    monkeypatch.setattr(poster, 'DENSITY_FILE', str(tmp_path / "density.json"))
+
+
+def bbox_for(dist):
+    return poster.calculate_map_bbox((45.438, 12.335), dist, (3, 4), verbose=False)
+
+
+def test_tiled_time_respects_rate_limit():
+    """Tiled downloads can't finish faster than the Overpass rate limit allows."""
+    bbox = bbox_for(29000)
+    requests = len(poster.split_bbox(bbox)) * 3
+    estimate = poster.estimate_job_cost(bbox, FIGSIZE, 300, 'tiled')
+    assert estimate['seconds'] >= requests / poster.RATE_LIMITS['overpass'][0]
+
+
+def test_lines_cheaper_than_graph():
+    """Geometry-only fetching is estimated below graph fetching in memory and time."""
+    bbox = bbox_for(10000)
+    graph = poster.estimate_job_cost(bbox, FIGSIZE, 300, 'graph')
+    lines = poster.estimate_job_cost(bbox, FIGSIZE, 300, 'lines')
+    assert lines['peak_memory'] < graph['peak_memory']
+    assert lines['seconds'] < graph['seconds']
+
+
+def test_plan_job_budgets():
+    """Jobs are degraded until they fit, or rejected when nothing fits."""
+    bbox = bbox_for(29000)
+    plan = poster.plan_job(bbox, FIGSIZE, 300, 'graph', max_time=600)
+    assert plan['fetch_mode'] == 'lines'
+    assert plan['estimate']['seconds'] <= 600
+    with pytest.raises(ValueError):
+        poster.plan_job(bbox, FIGSIZE, 300, 'graph', max_time=120)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for geometry-only road fetching.
+Feeds canned Overpass JSON through the query and parsing code, so nothing
+touches the network.
+
+Usage:
+    python -m pytest test_fetch_lines.py
+"""
+
+import create_map_poster as poster
+
+BBOX = {'north': 45.45, 'south': 45.42, 'east': 12.36, 'west': 12.31}
+
+
+def node(lon, lat):
+    return {'lon': lon, 'lat': lat}
+
+
+# An Overpass 'out geom' response; vertices outside a bbox-limited output are null
+OVERPASS_ROADS = {'elements': [
+    {'type': 'node', 'id': 1, 'lat': 45.43, 'lon': 12.33},
+    {'type': 'way', 'id': 100, 'tags': {'highway': 'primary', 'name': 'Strada Nuova'},
+     'geometry': [node(12.32, 45.43), node(12.33, 45.431), node(12.34, 45.432)]},
+    {'type': 'way', 'id': 101, 'tags': {},
+     'geometry': [node(12.32, 45.44), node(12.33, 45.44)]},
+    {'type': 'way', 'id': 102, 'tags': {'highway': 'footway'},
+     'geometry': [node(12.35, 45.425)]},
+    {'type': 'way', 'id': 103, 'tags': {'highway': 'secondary'},
+     'geometry': [node(12.31, 45.42), node(12.32, 45.42), None, None, node(12.34, 45.42), node(12.35, 45.42)]},
+    {'type': 'way', 'id': 104, 'tags': {'highway': 'tertiary'},
+     'geometry': [None, node(12.33, 45.45), node(12.34, 45.45), None]},
+]}
+
+
+def test_road_way_filter():
+    """Road classes narrow the way filter to their highway values, anchored."""
+    assert poster.road_way_filter() == poster.ROAD_WAY_FILTER
+    assert poster.road_way_filter(['motorway', 'default']) == poster.ROAD_WAY_FILTER
+
+    selected = poster.road_way_filter(['motorway', 'primary'])
+    assert selected.startswith(poster.ROAD_WAY_FILTER)
+    assert selected.endswith('["highway"~"^(motorway|motorway_link|trunk|trunk_link|primary|primary_link)$"]')
+
+
+def test_road_lines_from_overpass():
+    """Ways become lines indexed by id; nodes and single-vertex ways are skipped."""
+    roads = poster.road_lines_from_overpass(OVERPASS_ROADS['elements'])
+
+    assert list(roads.index) == [100, 101, 103, 104]
+    assert list(roads['highway']) == ['primary', 'unclassified', 'secondary', 'tertiary']
+    assert roads.crs == 'EPSG:4326'
+    assert list(roads.geometry.iloc[0].coords) == [(12.32, 45.43), (12.33, 45.431), (12.34, 45.432)]
+
+
+def test_clipped_ways_are_split():
+    """A way that leaves the output bbox and returns is split, never joined across the gap."""
+    roads = poster.road_lines_from_overpass(OVERPASS_ROADS['elements'])
+
+    left_and_back = roads.geometry.loc[103]
+    assert left_and_back.geom_type == 'MultiLineString'
+    assert [list(part.coords) for part in left_and_back.geoms] == [
+        [(12.31, 45.42), (12.32, 45.42)], [(12.34, 45.42), (12.35, 45.42)]]
+    assert list(roads.geometry.loc[104].coords) == [(12.33, 45.45), (12.34, 45.45)]
+
+
+def test_no_ways():
+    """An empty response is an empty layer with the usual columns."""
+    roads = poster.road_lines_from_overpass([])
+    assert roads.empty and list(roads.columns) == ['highway', 'geometry']
+
+
+def test_fetch_road_lines(monkeypatch):
+    """The query selects the filtered ways in the bbox with their full geometry."""
+    queries = []
+
+    def fake_query(query):
+        queries.append(query)
+        return OVERPASS_ROADS
+
+    monkeypatch.setattr(poster, 'overpass_query', fake_query)
+    roads = poster.fetch_road_lines(BBOX, road_classes=['secondary'])
+
+    assert len(roads) == 4
+    query = queries[0]
+    assert query.startswith(f"[out:json][timeout:{poster.OVERPASS_TIMEOUT}]")
+    assert f"way{poster.road_way_filter(['secondary'])}" in query
+    assert f"({BBOX['south']},{BBOX['west']},{BBOX['north']},{BBOX['east']});" in query
+    assert "[bbox:" not in query  # a global bbox would clip the geometry
+    assert "out geom" in query
+
+
+def test_split_ways_render():
+    """Mixed LineString and MultiLineString roads draw with per-road styles."""
+    roads = poster.road_lines_from_overpass(OVERPASS_ROADS['elements'])
+    fig, ax = poster.new_poster_figure((3, 4), 20)
+    poster.plot_roads(ax, roads, BBOX, theme=poster.load_theme('noir'))
+    assert len(ax.collections) == 1
+    assert len(ax.collections[0].get_paths()) == 5  # way 103 contributes two paths
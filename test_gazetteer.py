@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for offline gazetteer geocoding.
+Builds a small GeoNames-format dump and checks exact, accent-insensitive and
+prefix matching, the population tiebreak and country filtering.
+
+Usage:
+    python -m pytest test_gazetteer.py
+"""
+
+import os
+
+import pytest
+
+import create_map_poster as poster
+
+# name, ascii name, alternate names, lat, lon, country code, population
+PLACES = [
+    ("Paris", "Paris", "Lutetia,Parigi", 48.8534, 2.3488, "FR", 2138551),
+    ("Paris", "Paris", "", 33.6609, -95.5555, "US", 24171),
+    ("São Paulo", "Sao Paulo", "Sampa", -23.5475, -46.6361, "BR", 10021295),
+    ("São Luís", "Sao Luis", "", -2.5297, -44.3028, "BR", 875569),
+    ("Springfield", "Springfield", "", 39.8017, -89.6437, "US", 116565),
+    ("Springfield", "Springfield", "", 42.1015, -72.5898, "US", 155929),
+    ("Springfield", "Springfield", "", -27.6667, 153.0, "AU", 6000),
+]
+
+
+@pytest.fixture
+def gazetteer(tmp_path):
+    dump = tmp_path / "cities.txt"
+    with open(dump, 'w', encoding='utf-8') as f:
+        for geonameid, (name, ascii_name, alternates, lat, lon, country, population) in enumerate(PLACES):
+            fields = [str(geonameid), name, ascii_name, alternates, str(lat), str(lon), 'P', 'PPL',
+                      country, '', '', '', '', '', str(population), '', '', '', '2024-01-01']
+            f.write('\t'.join(fields) + '\n')
+    return str(dump)
+
+
+def lookup(gazetteer, city, country=None):
+    return poster.lookup_gazetteer(poster.load_gazetteer(gazetteer), city, country)
+
+
+def test_exact_match(gazetteer):
+    """Exact names and alternate names find the place, case-insensitively."""
+    assert lookup(gazetteer, "PARIS")['country'] == 'FR'
+    assert lookup(gazetteer, "parigi")['name'] == 'Paris'
+    assert lookup(gazetteer, "Sampa")['name'] == 'São Paulo'
+
+
+def test_accent_insensitive_match(gazetteer):
+    """Accented and unaccented spellings match each other."""
+    assert lookup(gazetteer, "sao luis")['name'] == 'São Luís'
+    assert lookup(gazetteer, "Sâo Paulo")['name'] == 'São Paulo'
+
+
+def test_prefix_match(gazetteer):
+    """Without an exact match, the most populous place with the prefix wins."""
+    assert lookup(gazetteer, "Sao")['name'] == 'São Paulo'
+    assert lookup(gazetteer, "Sao L")['name'] == 'São Luís'
+    assert lookup(gazetteer, "Atlantis") is None
+
+
+def test_population_tiebreak(gazetteer):
+    """Among places with the same name, the most populous one is returned."""
+    match = lookup(gazetteer, "Springfield")
+    assert (match['country'], match['population']) == ('US', 155929)
+
+
+def test_country_filter(gazetteer):
+    """Country names, aliases and ISO codes restrict the search to that country."""
+    assert lookup(gazetteer, "Paris", "United States")['population'] == 24171
+    assert lookup(gazetteer, "Paris", "USA")['population'] == 24171
+    assert lookup(gazetteer, "Paris", "us")['population'] == 24171
+    assert lookup(gazetteer, "Springfield", "Australia")['country'] == 'AU'
+    assert lookup(gazetteer, "Sao", "France") is None
+
+
+def test_unknown_country(gazetteer):
+    """An unrecognized country is no match rather than a worldwide search."""
+    assert lookup(gazetteer, "Paris", "Untied States") is None
+    assert lookup(gazetteer, "Paris", "ZZ") is None
+    with pytest.raises(ValueError):
+        poster.get_coordinates("Paris", "Untied States", gazetteer=gazetteer)
+
+
+def test_index_cache(gazetteer):
+    """The compiled index is pickled next to the dump and reused."""
+    lookup(gazetteer, "Paris")
+    poster._GAZETTEERS.clear()
+    assert os.path.exists(f"{gazetteer}.index.pkl")
+    assert lookup(gazetteer, "Paris")['country'] == 'FR'
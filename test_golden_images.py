@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Golden-image regression harness for the poster renderer.
+Renders fixed fixture datasets offline across themes, aspect ratios and
+gradient settings, and compares each poster with a stored reference image.
+
+Usage (from the repository root):
+    python test_golden_images.py            # compare against references
+    python test_golden_images.py --update   # re-render the reference images
+    python -m pytest test_golden_images.py  # same comparison under pytest
+
+Diff images for failing cases are written to regression/output/.
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from PIL import Image
+
+import create_map_poster as poster
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REGRESSION_DIR = os.path.join(HERE, "regression")
+FIXTURES_DIR = os.path.join(REGRESSION_DIR, "fixtures")
+REFERENCE_DIR = os.path.join(REGRESSION_DIR, "reference")
+OUTPUT_DIR = os.path.join(REGRESSION_DIR, "output")
+
+# Fixture datasets: name -> (city, country, (lat, lon), distance in meters)
+FIXTURES = {
+    'grid': ("New York", "USA", (40.7580, -73.9855), 2000),
+    'organic': ("Venice", "Italy", (45.4380, 12.3350), 2000),
+}
+THEMES = ['feature_based', 'noir', 'neon_cyberpunk']
+RATIOS = ['poster', 'wide']
+GRADIENTS = [True, False]
+DPI = 100
+
+# A pixel "changes" when its CIE76 color difference exceeds CHANGED_DELTA_E,
+# about half a just-noticeable difference, so that near-black layers on dark
+# themes still count. Matplotlib bundles its own FreeType and Agg, so renders
+# match references pixel for pixel; the limits below only absorb stray pixels.
+CHANGED_DELTA_E = 1.0
+MAX_CHANGED_FRACTION = 0.0001
+MAX_MEAN_DELTA_E = 0.02
+
+
+def build_cases():
+    """Every (fixture, theme, ratio, gradient) combination, with a stable case name."""
+    cases = []
+    for fixture in FIXTURES:
+        for theme in THEMES:
+            for ratio in RATIOS:
+                for gradient in GRADIENTS:
+                    name = f"{fixture}_{theme}_{ratio}_{'gradient' if gradient else 'flat'}"
+                    cases.append({'name': name, 'fixture': fixture, 'theme': theme,
+                                  'ratio': ratio, 'gradient': gradient})
+    return cases
+
+
+def build_fixture(name):
+    """
+    Generate a fixture dataset deterministically.
+
+    Only used with --rebuild-fixtures; the committed GeoJSON files are the
+    source of truth so that references don't depend on generator details.
+    """
+    _, _, (lat, lon), _ = FIXTURES[name]
+    rng = np.random.default_rng(sum(map(ord, name)))
+    deg_lat = 1 / 111000.0
+    deg_lon = 1 / (111000.0 * np.cos(np.radians(lat)))
+    classes = ['motorway', 'primary', 'secondary', 'tertiary', 'residential', 'service', 'footway']
+    rows = []
+
+    def square(x, y, w, h):
+        return shapely.box(lon + x * deg_lon, lat + y * deg_lat,
+                           lon + (x + w) * deg_lon, lat + (y + h) * deg_lat)
+
+    if name == 'grid':
+        for i, offset in enumerate(range(-3000, 3001, 150)):
+            highway = classes[i % len(classes)]
+            rows.append(('roads', highway, shapely.LineString(
+                [(lon + offset * deg_lon, lat - 3000 * deg_lat), (lon + offset * deg_lon, lat + 3000 * deg_lat)])))
+            rows.append(('roads', classes[(i * 3) % len(classes)], shapely.LineString(
+                [(lon - 3000 * deg_lon, lat + offset * deg_lat), (lon + 3000 * deg_lon, lat + offset * deg_lat)])))
+        # A river band and a park made of many small adjacent plots
+        rows.append(('water', None, square(-3000, -800, 6000, 300)))
+        for i in range(12):
+            for j in range(20):
+                rows.append(('parks', None, square(300 + i * 40, 200 + j * 40, 40, 40)))
+        rows.append(('parks', None, shapely.Point(lon, lat)))
+    else:
+        for i in range(300):
+            x, y = rng.uniform(-3000, 3000, 2)
+            steps = rng.normal(0, 120, (8, 2)).cumsum(axis=0)
+            coords = [(lon + (x + dx) * deg_lon, lat + (y + dy) * deg_lat) for dx, dy in steps]
+            rows.append(('roads', classes[i % len(classes)], shapely.LineString(coords)))
+        # A lagoon with islands (holes), and scattered parks including slivers
+        lagoon = square(-3000, -3000, 6000, 1800)
+        islands = [square(x, -2600, 300, 400).exterior.coords for x in range(-2500, 2500, 900)]
+        rows.append(('water', None, shapely.Polygon(lagoon.exterior.coords, islands)))
+        # A canal through the center, so water is in view at every aspect ratio
+        rows.append(('water', None, square(-3000, 150, 6000, 100)))
+        for x, y in rng.uniform(-2500, 2500, (40, 2)):
+            rows.append(('parks', None, square(x, y, rng.uniform(60, 300), rng.uniform(60, 300))))
+            rows.append(('parks', None, square(x + 400, y, 0.5, 0.5)))
+
+    gdf = gpd.GeoDataFrame({'layer': [r[0] for r in rows], 'highway': [r[1] for r in rows]},
+                           geometry=[shapely.set_precision(r[2], 1e-7) for r in rows],
+                           crs='EPSG:4326')
+    return gdf
+
+
+def load_fixture(name):
+    """Load a fixture GeoJSON into the map data layers used by the renderer."""
+    gdf = gpd.read_file(os.path.join(FIXTURES_DIR, f"{name}.geojson"))
+    layers = {}
+    for layer in ('roads', 'water', 'parks'):
+        part = gdf[gdf['layer'] == layer]
+        layers[layer] = part[['highway', 'geometry']] if layer == 'roads' else part[['geometry']]
+    return layers
+
+
+def render_case(case, output_file, fixtures, themes, figure_pool=None):
+    """Render one case through the same prepare/render path as the CLI."""
+    city, country, point, dist = FIXTURES[case['fixture']]
+    aspect_ratio = poster.parse_aspect_ratio(case['ratio'])
+    data = dict(fixtures[case['fixture']])
+    data['bbox'] = poster.calculate_map_bbox(point, dist, aspect_ratio, verbose=False)
+
+    figsize = poster.calculate_figure_size(aspect_ratio)
+    data = poster.prepare_map_data(data, figsize, DPI)
+    renderer = poster.Renderer(themes[case['theme']], poster.FONTS, figure_pool=figure_pool)
+    renderer.render(city, country, point, data, output_file, aspect_ratio=aspect_ratio,
+                    dpi=DPI, enable_gradients=case['gradient'], verbose=False)
+
+
+def _srgb_to_lab(rgb):
+    """Convert an (H, W, 3) sRGB array in 0-1 to CIE L*a*b* (D65)."""
+    linear = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    matrix = np.array([[0.4124, 0.3576, 0.1805],
+                       [0.2126, 0.7152, 0.0722],
+                       [0.0193, 0.1192, 0.9505]])
+    xyz = linear @ matrix.T / np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([116 * f[..., 1] - 16,
+                     500 * (f[..., 0] - f[..., 1]),
+                     200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+def compare_images(actual_file, reference_file):
+    """
+    Compare two images perceptually.
+
+    Returns:
+        dict: 'delta_e' (per-pixel CIE76 difference), 'mean_delta_e',
+              'changed_fraction' and 'passed'; or 'error' if the images
+              can't be compared (e.g. different sizes).
+    """
+    actual = np.asarray(Image.open(actual_file).convert('RGB'), dtype=np.float64) / 255
+    reference = np.asarray(Image.open(reference_file).convert('RGB'), dtype=np.float64) / 255
+    if actual.shape != reference.shape:
+        return {'passed': False, 'error': f"size {actual.shape[1]}x{actual.shape[0]} != "
+                                          f"reference {reference.shape[1]}x{reference.shape[0]}"}
+
+    delta_e = np.linalg.norm(_srgb_to_lab(actual) - _srgb_to_lab(reference), axis=-1)
+    mean_delta_e = float(delta_e.mean())
+    changed_fraction = float((delta_e > CHANGED_DELTA_E).mean())
+    return {
+        'delta_e': delta_e,
+        'mean_delta_e': mean_delta_e,
+        'changed_fraction': changed_fraction,
+        'passed': mean_delta_e <= MAX_MEAN_DELTA_E and changed_fraction <= MAX_CHANGED_FRACTION,
+    }
+
+
+def write_diff_image(reference_file, delta_e, output_file):
+    """Dimmed grayscale reference with differences overlaid in red (full red at ΔE 20)."""
+    reference = np.asarray(Image.open(reference_file).convert('L'), dtype=np.float64) / 255
+    base = 0.25 + 0.5 * reference
+    strength = np.clip(delta_e / 20.0, 0, 1)
+    diff = np.stack([base + (1 - base) * strength, base * (1 - strength), base * (1 - strength)], axis=-1)
+    Image.fromarray((diff * 255).astype(np.uint8)).save(output_file)
+
+
+@contextlib.contextmanager
+def empty_layer_cache():
+    """Point the preprocessing cache at a temporary directory, restoring and removing it afterwards."""
+    saved = poster.LAYER_CACHE_DIR
+    with tempfile.TemporaryDirectory(prefix="golden_layers_") as cache_dir:
+        poster.LAYER_CACHE_DIR = cache_dir
+        try:
+            yield cache_dir
+        finally:
+            poster.LAYER_CACHE_DIR = saved
+
+
+def run(update=False, verbose=True):
+    """
+    Render every case and compare it with (or, with update=True, store it as) the reference.
+
+    Run it with an empty LAYER_CACHE_DIR so every case exercises the
+    preprocessing cache from scratch.
+
+    Returns:
+        list: Names of the failing cases
+    """
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    os.makedirs(REFERENCE_DIR, exist_ok=True)
+    fixtures = {name: load_fixture(name) for name in FIXTURES}
+    themes = {name: poster.load_theme(name) for name in THEMES}
+    # Reuse figures across cases, as warm workers do; the threaded test covers fresh figures
+    figure_pool = poster.FigurePool()
+
+    failures = []
+    for case in build_cases():
+        reference_file = os.path.join(REFERENCE_DIR, f"{case['name']}.png")
+        actual_file = os.path.join(OUTPUT_DIR, f"{case['name']}.png")
+        render_case(case, reference_file if update else actual_file, fixtures, themes, figure_pool)
+        if update:
+            if verbose:
+                print(f"  updated  {case['name']}")
+            continue
+
+        if not os.path.exists(reference_file):
+            failures.append(case['name'])
+            if verbose:
+                print(f"  MISSING  {case['name']} (run with --update)")
+            continue
+
+        result = compare_images(actual_file, reference_file)
+        if 'error' in result:
+            failures.append(case['name'])
+            if verbose:
+                print(f"  FAIL     {case['name']}: {result['error']}")
+            continue
+
+        if not result['passed']:
+            failures.append(case['name'])
+            diff_file = os.path.join(OUTPUT_DIR, f"{case['name']}_diff.png")
+            write_diff_image(reference_file, result['delta_e'], diff_file)
+        if verbose:
+            status = "ok" if result['passed'] else "FAIL"
+            print(f"  {status:<8} {case['name']}: mean ΔE {result['mean_delta_e']:.3f}, "
+                  f"changed {result['changed_fraction'] * 100:.2f}%")
+    return failures
+
+
+@pytest.fixture(autouse=True)
+def layer_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(poster, 'LAYER_CACHE_DIR', str(tmp_path / "layers"))
+
+
+def test_golden_images():
+    """Every rendered case matches its reference within tolerance."""
+    failures = run(verbose=False)
+    assert not failures, f"Posters differ from references (see {OUTPUT_DIR}): {', '.join(failures)}"
+
+
+def test_concurrent_renders():
+    """Renderers used from several threads at once produce the reference images."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    fixtures = {name: load_fixture(name) for name in FIXTURES}
+    themes = {name: poster.load_theme(name) for name in THEMES}
+    cases = build_cases()[::3]
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    def render(case):
+        output_file = os.path.join(OUTPUT_DIR, f"{case['name']}_threaded.png")
+        render_case(case, output_file, fixtures, themes)
+        return compare_images(output_file, os.path.join(REFERENCE_DIR, f"{case['name']}.png"))
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(render, cases))
+    failures = [case['name'] for case, result in zip(cases, results) if not result['passed']]
+    assert not failures, f"Threaded renders differ from references: {', '.join(failures)}"
+
+
+def _drop_layer(fixtures, themes, layer):
+    return {name: {**data, layer: None} for name, data in fixtures.items()}, themes
+
+
+def _recolor_layer(fixtures, themes, layer):
+    """Shift the layer's color by 4/255 per channel, towards mid-gray."""
+    recolored = {}
+    for name, theme in themes.items():
+        rgb = np.array(theme[layer][:3])
+        recolored[name] = {**theme, layer: (*(rgb + np.where(rgb < 0.5, 4, -4) / 255), theme[layer][3])}
+    return fixtures, recolored
+
+
+def test_tolerance_catches_layer_changes():
+    """A dropped or slightly recolored layer fails the comparison in every case."""
+    fixtures = {name: load_fixture(name) for name in FIXTURES}
+    themes = {name: poster.load_theme(name) for name in THEMES}
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output_file = os.path.join(OUTPUT_DIR, "mutated.png")
+
+    passed = []
+    for mutate in (_drop_layer, _recolor_layer):
+        for layer in ('water', 'parks'):
+            mutated_fixtures, mutated_themes = mutate(fixtures, themes, layer)
+            for case in build_cases()[::3]:
+                render_case(case, output_file, mutated_fixtures, mutated_themes)
+                if compare_images(output_file, os.path.join(REFERENCE_DIR, f"{case['name']}.png"))['passed']:
+                    passed.append(f"{case['name']} ({mutate.__name__[1:]} {layer})")
+    assert not passed, f"Changed posters pass the comparison: {', '.join(passed)}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Golden-image regression harness")
+    parser.add_argument('--update', action='store_true', help='Re-render the reference images')
+    parser.add_argument('--rebuild-fixtures', action='store_true',
+                        help='Regenerate the fixture GeoJSON files (changes every reference)')
+    args = parser.parse_args()
+
+    if args.rebuild_fixtures:
+        os.makedirs(FIXTURES_DIR, exist_ok=True)
+        for name in FIXTURES:
+            build_fixture(name).to_file(os.path.join(FIXTURES_DIR, f"{name}.geojson"), driver='GeoJSON')
+            print(f"  rebuilt  {name}.geojson")
+
+    print("=" * 60)
+    print("Golden-Image Regression")
+    print("=" * 60)
+    with empty_layer_cache():
+        failures = run(update=args.update)
+    print()
+    if args.update:
+        print(f"✓ References written to {REFERENCE_DIR}")
+    elif failures:
+        print(f"✗ {len(failures)} case(s) differ. Diff images are in {OUTPUT_DIR}")
+    else:
+        print("✓ All cases match their references")
+    sys.exit(1 if failures and not args.update else 0)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared HTTP client and rate limiter.
+Runs http_request() against a local stand-in server that can answer with
+throttling and server errors, and records which connection each request used.
+
+Usage:
+    python -m pytest test_http_client.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import osmnx as ox
+import pytest
+import requests
+
+import create_map_poster as poster
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers with the server's queued (status, headers) responses, then 200."""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.client_address[1], time.monotonic()))
+        status, headers = self.server.responses.pop(0) if self.server.responses else (200, {})
+        body = json.dumps(self.server.body).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    httpd.requests = []
+    httpd.responses = []
+    httpd.body = {}
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    # Fresh, fast buckets so tests only wait for the delays they check
+    monkeypatch.setattr(poster, '_RATE_LIMITERS', {})
+    monkeypatch.setitem(poster.RATE_LIMITS, 'overpass', (100.0, 10))
+    monkeypatch.setattr(poster, 'HTTP_BACKOFF_BASE', 0.2)
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_retry_after(server):
+    """A 429 is retried after the server's Retry-After delay, and slows the bucket."""
+    server.responses.append((429, {'Retry-After': '1'}))
+    response = poster.http_request('overpass', 'GET', f"{server.url}/interpreter", timeout=5)
+
+    assert response.status_code == 200
+    assert len(server.requests) == 2
+    assert server.requests[1][2] - server.requests[0][2] >= 0.95
+    bucket = poster.get_rate_limiter('overpass')
+    assert bucket.rate < bucket.max_rate
+
+
+def test_backoff(server):
+    """5xx responses without Retry-After are retried with growing, jittered delays."""
+    server.responses.extend([(503, {}), (502, {})])
+    response = poster.http_request('overpass', 'GET', f"{server.url}/interpreter", timeout=5)
+
+    assert response.status_code == 200
+    times = [t for _, _, t in server.requests]
+    assert len(times) == 3
+    # Attempt n waits between half and all of HTTP_BACKOFF_BASE * 2**n
+    assert times[1] - times[0] >= 0.1
+    assert times[2] - times[1] >= 0.2
+
+
+def test_retries_exhausted(server, monkeypatch):
+    """After HTTP_MAX_RETRIES retries the last error response is returned."""
+    monkeypatch.setattr(poster, 'HTTP_MAX_RETRIES', 1)
+    monkeypatch.setattr(poster, 'HTTP_BACKOFF_BASE', 0.01)
+    server.responses.extend([(503, {})] * 3)
+    response = poster.http_request('overpass', 'GET', f"{server.url}/interpreter", timeout=5)
+
+    assert response.status_code == 503
+    assert len(server.requests) == 2
+
+
+def test_connection_reuse(server):
+    """Consecutive requests share one keep-alive connection."""
+    for _ in range(5):
+        assert poster.http_request('overpass', 'GET', f"{server.url}/interpreter", timeout=5).ok
+    assert len({port for _, port, _ in server.requests}) == 1
+
+
+def test_import_leaves_osmnx_alone():
+    """Importing the module doesn't reroute OSMnx or change its settings."""
+    check = ("import osmnx, requests, create_map_poster; "
+             "assert osmnx._overpass.requests is requests; "
+             "assert osmnx.settings.overpass_rate_limit")
+    subprocess.run([sys.executable, '-c', check], cwd=HERE, check=True)
+
+
+# A square lake, as Overpass returns it for a features query
+LAKE = {'elements': [
+    *({'type': 'node', 'id': i, 'lat': 45.0 + dy, 'lon': 12.0 + dx}
+      for i, (dx, dy) in enumerate([(0, 0), (0.01, 0), (0.01, 0.01), (0, 0.01)], start=1)),
+    {'type': 'way', 'id': 10, 'nodes': [1, 2, 3, 4, 1], 'tags': {'natural': 'water'}},
+]}
+
+
+@pytest.fixture
+def osmnx_server(server, monkeypatch):
+    """Route OSMnx to the stand-in server, restoring its settings afterwards."""
+    for name in ('overpass_url', 'nominatim_url', 'overpass_rate_limit', 'use_cache'):
+        monkeypatch.setattr(ox.settings, name, getattr(ox.settings, name))
+    monkeypatch.setattr(ox._overpass, 'requests', ox._overpass.requests)
+    monkeypatch.setattr(ox._nominatim, 'requests', ox._nominatim.requests)
+    monkeypatch.setattr(poster, 'ENDPOINTS', dict(poster.ENDPOINTS))
+    monkeypatch.setattr(poster, '_ENDPOINTS_CONFIGURED', False)
+    ox.settings.use_cache = False
+    poster.configure_endpoints(overpass_url=f"{server.url}/api")
+    server.body = LAKE
+    return server
+
+
+def test_osmnx_goes_through_client(osmnx_server):
+    """OSMnx feature queries use the shared client and its retries."""
+    osmnx_server.responses.append((429, {'Retry-After': '0'}))
+    features = ox.features_from_bbox(bbox=(11.99, 44.99, 12.02, 45.02), tags={'natural': 'water'})
+
+    assert list(features.index) == [('way', 10)]
+    assert [path for path, _, _ in osmnx_server.requests] == ['/api/interpreter'] * 2
+
+
+def test_osmnx_throttled_raises(osmnx_server, monkeypatch):
+    """Sustained throttling raises instead of entering OSMnx's fixed-sleep retry loop."""
+    monkeypatch.setattr(poster, 'HTTP_MAX_RETRIES', 2)
+    osmnx_server.responses.extend([(429, {'Retry-After': '0'})] * 10)
+    started = time.monotonic()
+    with pytest.raises(requests.HTTPError):
+        ox.features_from_bbox(bbox=(11.99, 44.99, 12.02, 45.02), tags={'natural': 'water'})
+
+    assert len(osmnx_server.requests) == 3
+    assert time.monotonic() - started < 10
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for polygon layer preprocessing.
+Checks that water and park layers keep every visible area, including
+areas only recoverable by repairing invalid OSM polygons.
+
+Usage:
+    python -m pytest test_preprocessing.py
+"""
+
+import geopandas as gpd
+import pytest
+import shapely
+from shapely.geometry import LineString, Point, Polygon, box
+
+import create_map_poster as poster
+
+PIXEL = (0.01, 0.01)
+
+
+def layer(*geometries):
+    return gpd.GeoDataFrame(geometry=list(geometries), crs='EPSG:4326')
+
+
+def area(result):
+    return 0.0 if result is None else result.geometry.iloc[0].area
+
+
+def test_dissolves_polygons():
+    """Overlapping polygons become one multipolygon covering their union."""
+    result = poster.preprocess_polygons(layer(box(0, 0, 2, 2), box(1, 1, 3, 3), box(5, 5, 6, 6)), PIXEL)
+    assert len(result) == 1
+    assert result.geometry.iloc[0].geom_type == 'MultiPolygon'
+    assert area(result) == pytest.approx(8.0)
+
+
+def test_drops_lines_points_and_slivers():
+    """Non-areal features and areas smaller than a pixel are dropped."""
+    sliver = box(10, 10, 10.001, 10.001)
+    result = poster.preprocess_polygons(layer(LineString([(0, 0), (1, 1)]), Point(3, 3), sliver), PIXEL)
+    assert result is None
+
+
+def test_repairs_invalid_polygons():
+    """A self-intersecting polygon with a spike keeps its valid area."""
+    # make_valid() turns this into GeometryCollection(MultiPolygon, LineString)
+    spiked_bowtie = Polygon([(0, 0), (2, 2), (2, 0), (0, 2), (0, 0), (-3, 0), (0, 0)])
+    assert not spiked_bowtie.is_valid
+    assert shapely.make_valid(spiked_bowtie).geom_type == 'GeometryCollection'
+
+    result = poster.preprocess_polygons(layer(spiked_bowtie, box(5, 0, 6, 3)), PIXEL)
+    assert area(result) == pytest.approx(5.0)
+
+
+def test_layer_cache(tmp_path, monkeypatch):
+    """Cached layers are reused for identical input and resolution."""
+    monkeypatch.setattr(poster, 'LAYER_CACHE_DIR', str(tmp_path))
+    gdf = layer(box(0, 0, 1, 1))
+    first = poster.prepare_polygon_layer('parks', gdf, PIXEL)
+    assert len(list(tmp_path.glob('parks_*.pkl'))) == 1
+    assert area(poster.prepare_polygon_layer('parks', gdf, PIXEL)) == area(first)
+    poster.prepare_polygon_layer('parks', gdf, (0.02, 0.02))
+    assert len(list(tmp_path.glob('parks_*.pkl'))) == 2
+
+
+def test_concurrent_cache_writes(tmp_path, monkeypatch, capsys):
+    """Threads preparing the same layer at once don't trip over each other's temp files."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    monkeypatch.setattr(poster, 'LAYER_CACHE_DIR', str(tmp_path))
+    gdf = layer(*[box(i, 0, i + 0.5, 0.5) for i in range(200)])
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: poster.prepare_polygon_layer('water', gdf, PIXEL), range(16)))
+
+    assert "Could not cache" not in capsys.readouterr().out
+    assert all(area(result) == pytest.approx(50.0) for result in results)
+    assert [path.suffix for path in tmp_path.iterdir()] == ['.pkl']
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for zoom sequences.
+Downloads are stubbed with a small synthetic dataset, so sequences render
+offline through their real worker processes.
+
+Usage:
+    python -m pytest test_sequence.py
+"""
+
+import os
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from PIL import Image
+from shapely.geometry import LineString, box
+
+import create_map_poster as poster
+
+POINT = (45.438, 12.335)
+
+
+def fake_fetch(point, dist, aspect_ratio=(3, 4), fill=False, fetch_mode='graph', road_classes=None):
+    lat, lon = point
+    # Wiggly roads at increasing distance from the center, with many vertices to simplify
+    xs = np.linspace(-0.05, 0.05, 400)
+    roads = gpd.GeoDataFrame({'highway': ['primary', 'residential', 'tertiary']}, crs='EPSG:4326', geometry=[
+        LineString(np.column_stack([lon + xs, lat + offset + 0.0002 * np.sin(xs * 3000)]))
+        for offset in (0.0, 0.01, 0.04)
+    ])
+    water = gpd.GeoDataFrame(geometry=[box(lon - 0.05, lat - 0.05, lon + 0.05, lat - 0.03)], crs='EPSG:4326')
+    return {'bbox': poster.calculate_map_bbox(point, dist, aspect_ratio, verbose=False),
+            'roads': roads, 'water': water, 'parks': None}
+
+
+def test_level_of_detail():
+    """Tolerances halve per level, vertex counts grow, and the last level is the original data."""
+    data = fake_fetch(POINT, 5000)
+    lod = poster.build_level_of_detail(data, 0.001, levels=3)
+
+    assert [tolerance for tolerance, _ in lod] == [0.0005, 0.00025, 0.000125, 0.0]
+    vertices = [shapely.get_num_coordinates(layers['roads'].geometry.values).sum() for _, layers in lod]
+    assert vertices == sorted(vertices)
+    assert lod[-1][1]['roads'] is data['roads']
+
+
+def test_frame_selects_level_and_extent(monkeypatch):
+    """A frame uses the coarsest level within half a pixel, and only features in view."""
+    rendered = []
+
+    class RecordingRenderer:
+        def render(self, city, country, point, data, output_file, verbose=True, **options):
+            rendered.append(data)
+
+    data = fake_fetch(POINT, 5000)
+    lod = poster.build_level_of_detail(data, 0.001, levels=3)
+    monkeypatch.setattr(poster, '_FRAME_RENDERER', RecordingRenderer())
+    monkeypatch.setattr(poster, '_FRAME_LAYERS', lod)
+
+    lat, lon = POINT
+    bbox = {'north': lat + 0.02, 'south': lat - 0.005, 'east': lon + 0.01, 'west': lon - 0.01}
+    poster._render_frame(("Venice", "Italy", POINT, bbox, 0.0006, "frame.png", {}))
+
+    frame = rendered[0]
+    assert frame['bbox'] is bbox
+    assert frame['roads'] is not None and list(frame['roads'].index) == [0, 1]  # 0.04° north is out of view
+    assert frame['water'].empty
+    # 0.0006° pixels allow up to 0.0003° of simplification: level 1 (0.00025)
+    assert frame['roads'].geometry.iloc[0].equals(lod[1][1]['roads'].geometry.iloc[0])
+
+
+def test_write_animation(tmp_path):
+    """Frames are combined in order into a looping GIF no wider than GIF_MAX_WIDTH."""
+    frame_files = []
+    for i, color in enumerate(['red', 'green', 'blue']):
+        path = tmp_path / f"frame_{i + 1:04d}.png"
+        Image.new('RGBA', (1000, 1300), color).save(path)
+        frame_files.append(str(path))
+
+    gif_file = str(tmp_path / "animation.gif")
+    poster.write_animation(frame_files, gif_file, fps=10)
+
+    with Image.open(gif_file) as gif:
+        assert gif.size == (poster.GIF_MAX_WIDTH, round(1300 * poster.GIF_MAX_WIDTH / 1000))
+        assert gif.n_frames == 3
+        assert gif.info['duration'] == 100
+        gif.seek(2)
+        assert gif.convert('RGB').getpixel((10, 10)) == (0, 0, 255)
+
+
+def test_create_poster_sequence(monkeypatch, tmp_path):
+    """A sequence renders numbered frames from one fetch and writes the GIF."""
+    fetches = []
+
+    def counting_fetch(*args, **kwargs):
+        fetches.append(args)
+        return fake_fetch(*args, **kwargs)
+
+    monkeypatch.setattr(poster, 'fetch_map_data', counting_fetch)
+    monkeypatch.setattr(poster, 'LAYER_CACHE_DIR', str(tmp_path / "layers"))
+    monkeypatch.setattr(poster, 'THEME', poster.load_theme('noir'))
+    output_dir = str(tmp_path / "sequence")
+
+    frame_files = poster.create_poster_sequence("Venice", "Italy", POINT, 4000, 1000, 4, output_dir,
+                                                dpi=20, workers=1, gif=True)
+
+    assert len(fetches) == 1 and fetches[0][1] == 4000
+    assert [os.path.basename(path) for path in frame_files] == [f"frame_{i:04d}.png" for i in range(1, 5)]
+    sizes = {Image.open(path).size for path in frame_files}
+    assert sizes == {(240, 320)}
+    with Image.open(os.path.join(output_dir, "animation.gif")) as gif:
+        assert gif.n_frames == 4
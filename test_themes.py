@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests for theme validation, compilation and road classification.
+
+Usage:
+    python -m pytest test_themes.py
+"""
+
+import json
+import os
+import pickle
+import threading
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import LineString
+
+import create_map_poster as poster
+
+NOIR_FILE = os.path.join(poster.THEMES_DIR, "noir.json")
+
+
+def raw_theme(**changes):
+    with open(NOIR_FILE) as f:
+        theme = json.load(f)
+    theme.update(changes)
+    return {key: value for key, value in theme.items() if value is not None}
+
+
+def test_compile_theme():
+    """Colors become RGBA tuples and road styles arrays indexed by road class."""
+    theme = poster.compile_theme(raw_theme(bg="#FF0000"))
+    assert theme['bg'] == (1.0, 0.0, 0.0, 1.0)
+    assert theme['road_colors'].shape == (len(poster.ROAD_CLASSES), 4)
+    assert list(theme['road_widths']) == [poster.ROAD_WIDTHS[name] for name in poster.ROAD_CLASSES]
+    assert poster.compile_theme(theme) is theme
+
+
+def test_missing_key():
+    """A theme without a required color is rejected, naming the key."""
+    with pytest.raises(ValueError, match=r"missing key\(s\): water"):
+        poster.compile_theme(raw_theme(water=None), source="test theme")
+
+
+def test_invalid_color():
+    """A color matplotlib can't parse is rejected, naming the key and value."""
+    with pytest.raises(ValueError, match=r"invalid color for 'parks': '#12345'"):
+        poster.compile_theme(raw_theme(parks="#12345"))
+    with pytest.raises(ValueError, match="invalid color for 'text'"):
+        poster.compile_theme(raw_theme(text=42))
+
+
+def test_raw_theme_is_always_validated():
+    """JSON that looks compiled is still checked; only compiled themes are trusted."""
+    with pytest.raises(ValueError, match="invalid color"):
+        poster.compile_theme(raw_theme(bg="not a color", road_colors=[[0, 0, 0, 1]] * 6))
+
+
+def test_compiled_theme_survives_pickling():
+    """Worker processes receive a theme that is still marked as compiled."""
+    theme = pickle.loads(pickle.dumps(poster.compile_theme(raw_theme())))
+    assert poster.compile_theme(theme) is theme
+
+
+def test_registry_reports_invalid_files(tmp_path):
+    """Invalid theme files are left out of names() and explained in errors."""
+    (tmp_path / "good.json").write_text(json.dumps(raw_theme()))
+    (tmp_path / "bad.json").write_text(json.dumps(raw_theme(road_primary="#GGGGGG")))
+    (tmp_path / "broken.json").write_text("{")
+
+    registry = poster.ThemeRegistry(str(tmp_path))
+    assert registry.names() == ['good']
+    assert set(registry.errors) == {'bad', 'broken'}
+    with pytest.raises(ValueError, match="road_primary"):
+        registry.get('bad')
+
+
+def test_road_classes_agree():
+    """Estimates count roads in the same classes they are drawn with."""
+    highway = pd.Series(['motorway_link', ['primary', 'secondary'], 'service', None, np.nan,
+                         'unclassified', []], dtype=object)
+    names = [list(poster.ROAD_CLASSES)[i] for i in poster.road_style_indices(highway)]
+    assert names == ['motorway', 'primary', 'default', 'residential', 'residential',
+                     'residential', 'residential']
+
+
+def test_record_density_uses_drawing_classes(tmp_path, monkeypatch):
+    """Roads without a highway tag are recorded as residential, as they are drawn."""
+    monkeypatch.setattr(poster, 'DENSITY_FILE', str(tmp_path / "density.json"))
+    bbox = {'north': 0.01, 'south': 0.0, 'east': 0.01, 'west': 0.0}
+    roads = gpd.GeoDataFrame({'highway': [None, 'service']}, crs='EPSG:4326',
+                             geometry=[LineString([(0, 0), (0.01, 0.01)])] * 2)
+    poster.record_density({'bbox': bbox, 'roads': roads, 'water': None, 'parks': None}, 'lines')
+
+    with open(poster.DENSITY_FILE) as f:
+        ways = next(iter(json.load(f).values()))['ways']
+    assert ways['residential'] == pytest.approx(ways['default'])
+    assert ways['residential'] > 0
+
+
+def write_theme(path, text, mtime):
+    # Explicit mtimes, so edits within one clock tick still count as changes
+    path.write_text(text)
+    os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def shared_registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(poster, 'THEMES_DIR', str(tmp_path))
+    monkeypatch.setattr(poster, '_THEME_REGISTRY', None)
+    return tmp_path
+
+
+def test_renderer_follows_watched_theme(shared_registry):
+    """A renderer built from a theme name picks up edits once watching is on."""
+    live = shared_registry / "live.json"
+    write_theme(live, json.dumps(raw_theme(bg="#FF0000")), 10**9)
+    renderer = poster.Renderer('live', fonts=None, watch=True)
+    assert poster.get_theme_registry().watch
+    poster.get_theme_registry().poll_interval = 0
+    assert renderer.theme['bg'] == (1.0, 0.0, 0.0, 1.0)
+
+    write_theme(live, json.dumps(raw_theme(bg="#0000FF")), 2 * 10**9)
+    assert renderer.theme['bg'] == (0.0, 0.0, 1.0, 1.0)
+
+    # A half-edited file keeps the last good version
+    write_theme(live, "{", 3 * 10**9)
+    assert renderer.theme['bg'] == (0.0, 0.0, 1.0, 1.0)
+    assert 'live' in poster.get_theme_registry().errors
+
+    poster.get_theme_registry(watch=False)
+    assert poster.get_theme_registry().watch
+
+
+def test_registry_reads_during_refresh(tmp_path):
+    """names() and get() stay consistent while another thread reloads themes."""
+    (tmp_path / "stable.json").write_text(json.dumps(raw_theme()))
+    registry = poster.ThemeRegistry(str(tmp_path))
+    extra = tmp_path / "extra.json"
+
+    # Tables already handed out are never changed under their readers
+    themes, errors = registry.themes, registry.errors
+    extra.write_text("{")
+    registry.refresh()
+    assert 'extra' in registry.errors and not errors
+    extra.write_text(json.dumps(raw_theme()))
+    os.utime(extra, ns=(10**9, 10**9))
+    registry.refresh()
+    assert 'extra' in registry.themes and list(themes) == ['stable']
+    extra.unlink()
+
+    stop = threading.Event()
+    failures = []
+
+    def reload():
+        while not stop.is_set():
+            extra.write_text(json.dumps(raw_theme()))
+            registry.refresh()
+            extra.unlink()
+            registry.refresh()
+
+    def read():
+        try:
+            for _ in range(2000):
+                assert 'stable' in registry.names()
+                assert registry.get('stable')['bg']
+                list(registry.errors.items())
+        except Exception as e:
+            failures.append(e)
+
+    writer = threading.Thread(target=reload)
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    writer.start()
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    stop.set()
+    writer.join()
+    assert not failures
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for tiled fetching.
+Checks the global tile grid, deduplication when merging tiles, and per-tile
+retries and caching, with downloads stubbed out so nothing touches the network.
+
+Usage:
+    python -m pytest test_tiling.py
+"""
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+import shapely
+from shapely.geometry import LineString, box
+
+import create_map_poster as poster
+
+BBOX = {'north': 40.95, 'south': 40.73, 'east': -73.87, 'west': -74.05}
+
+
+@pytest.fixture(autouse=True)
+def tile_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(poster, 'TILE_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(poster, '_backoff_delay', lambda attempt: 0)
+    return tmp_path
+
+
+def tile_box(tile):
+    return box(tile['west'], tile['south'], tile['east'], tile['north'])
+
+
+def roads(ids, geometries):
+    return gpd.GeoDataFrame({'highway': ['residential'] * len(ids)}, geometry=geometries,
+                            index=ids, crs='EPSG:4326')
+
+
+def test_split_bbox_grid():
+    """Tiles lie on the global grid and cover the bbox exactly once."""
+    tiles = poster.split_bbox(BBOX, 0.1)
+    assert len(tiles) == 9
+    for tile in tiles:
+        for edge in tile.values():
+            assert edge == pytest.approx(round(edge / 0.1) * 0.1, abs=1e-9)
+        assert tile['north'] - tile['south'] == pytest.approx(0.1)
+        assert tile['east'] - tile['west'] == pytest.approx(0.1)
+
+    boxes = [tile_box(tile) for tile in tiles]
+    union = shapely.union_all(boxes)
+    assert union.contains(box(BBOX['west'], BBOX['south'], BBOX['east'], BBOX['north']))
+    assert union.area == pytest.approx(sum(b.area for b in boxes))  # no overlaps
+
+
+def test_split_bbox_shared_tiles():
+    """Overlapping bboxes produce identical tiles, so their caches are shared."""
+    shifted = {key: value + 0.06 for key, value in BBOX.items()}
+    common = [tile for tile in poster.split_bbox(BBOX, 0.1) if tile in poster.split_bbox(shifted, 0.1)]
+    assert len(common) == 6
+
+
+def test_merge_tiles_roads():
+    """A way crossing a tile border is kept once; ways outside the bbox are dropped."""
+    crossing = LineString([(-74.0, 40.79), (-73.9, 40.81)])
+    west = roads([1, 2], [crossing, LineString([(-74.0, 40.75), (-73.99, 40.76)])])
+    east = roads([1, 3], [crossing, LineString([(-73.95, 40.9), (-73.94, 40.91)])])
+    outside = roads([4], [LineString([(-73.5, 40.8), (-73.4, 40.8)])])
+
+    merged = poster.merge_tiles([west, None, east, outside], BBOX)
+    assert list(merged.index) == [1, 2, 3]
+    assert poster.merge_tiles([None, roads([], [])], BBOX) is None
+
+
+def test_merge_tiles_joins_clipped_pieces():
+    """A way clipped to each tile is put back together rather than cut at the border."""
+    west = roads([1], [LineString([(-74.0, 40.8), (-73.95, 40.8)])])
+    east = roads([1], [LineString([(-73.95, 40.8), (-73.9, 40.8)])])
+    merged = poster.merge_tiles([west, east], BBOX)
+
+    assert list(merged.index) == [1]
+    assert merged.geometry.iloc[0].equals(LineString([(-74.0, 40.8), (-73.9, 40.8)]))
+
+
+def test_merge_tiles_polygons():
+    """Polygons present in several tiles are deduplicated by (element, id)."""
+    park = box(-74.02, 40.78, -73.98, 40.82)
+    index = pd.MultiIndex.from_tuples
+    first = gpd.GeoDataFrame(geometry=[park, box(-74.04, 40.74, -74.03, 40.75)],
+                             index=index([('way', 10), ('way', 11)]), crs='EPSG:4326')
+    second = gpd.GeoDataFrame(geometry=[park, box(-73.9, 40.9, -73.89, 40.91)],
+                              index=index([('way', 10), ('relation', 10)]), crs='EPSG:4326')
+
+    merged = poster.merge_tiles([first, second], BBOX)
+    assert list(merged.index) == [('way', 10), ('way', 11), ('relation', 10)]
+
+
+def test_fetch_tile_retries_and_caches(monkeypatch):
+    """Failed downloads are retried, and the result is cached per tile and query."""
+    calls = []
+    result = roads([1], [LineString([(0, 0), (0.05, 0.05)])])
+
+    def download(layer, tile, road_classes=None):
+        calls.append((layer, road_classes))
+        if len(calls) <= 2:
+            raise ConnectionError("stub outage")
+        return result
+
+    monkeypatch.setattr(poster, '_download_tile', download)
+    tile = poster.split_bbox({'north': 0.05, 'south': 0.01, 'east': 0.05, 'west': 0.01})[0]
+
+    assert list(poster.fetch_tile('roads', tile).index) == [1]
+    assert len(calls) == 3
+    assert list(poster.fetch_tile('roads', tile).index) == [1]
+    assert len(calls) == 3  # served from the cache
+    poster.fetch_tile('roads', tile, road_classes=['motorway'])
+    assert calls[-1] == ('roads', ['motorway'])  # other query, other cache entry
+
+
+def test_fetch_tile_gives_up(monkeypatch, tile_cache):
+    """After TILE_MAX_RETRIES retries the error is raised and nothing is cached."""
+    calls = []
+
+    def download(layer, tile, road_classes=None):
+        calls.append(layer)
+        raise ConnectionError("stub outage")
+
+    monkeypatch.setattr(poster, '_download_tile', download)
+    tile = poster.split_bbox({'north': 0.05, 'south': 0.01, 'east': 0.05, 'west': 0.01})[0]
+    with pytest.raises(ConnectionError):
+        poster.fetch_tile('water', tile)
+    assert len(calls) == poster.TILE_MAX_RETRIES + 1
+    assert not list(tile_cache.iterdir())
+
+
+def test_fetch_tiled(monkeypatch):
+    """Tiles are merged per layer; failing feature tiles only leave gaps."""
+    crossing = LineString([(BBOX['west'], 40.8), (BBOX['east'], 40.8)])
+
+    def download(layer, tile, road_classes=None):
+        if layer == 'parks':
+            raise ConnectionError("stub outage")
+        if layer == 'water':
+            return gpd.GeoDataFrame(geometry=[], crs='EPSG:4326')
+        own_id = int(round(tile['south'] * 10)) * 1000 + int(round(tile['west'] * 10))
+        center = tile_box(tile).intersection(box(BBOX['west'], BBOX['south'], BBOX['east'], BBOX['north'])).centroid
+        return roads([0, own_id], [crossing, LineString([(center.x, center.y), (center.x + 0.001, center.y)])])
+
+    monkeypatch.setattr(poster, '_download_tile', download)
+    layers = poster.fetch_tiled(BBOX, tile_size=0.1, workers=2)
+
+    assert layers['roads'].index.is_unique
+    assert len(layers['roads']) == 1 + 9
+    assert layers['water'] is None
+    assert layers['parks'] is None
+
+
+def test_fetch_tiled_clipped_roads(monkeypatch):
+    """A road spanning several tiles is whole after merging, even if each tile only returns its piece."""
+    crossing = LineString([(BBOX['west'], 40.8), (BBOX['east'], 40.8)])
+
+    def download(layer, tile, road_classes=None):
+        if layer != 'roads':
+            return None
+        return roads([0], [crossing.intersection(tile_box(tile))])
+
+    monkeypatch.setattr(poster, '_download_tile', download)
+    layers = poster.fetch_tiled(BBOX, tile_size=0.1, workers=2)
+
+    assert list(layers['roads'].index) == [0]
+    assert layers['roads'].geometry.iloc[0].equals(crossing)